@@ -0,0 +1,297 @@
+# TAC_alerts.py
+# 소진율 임계치(50/80/95%) 통과 알림
+#   • 적재 시점에 키(선적지/선박)별 마지막으로 본 소진율과 새 값만 비교해 통과한 임계치를 검출 (전체 재스캔 없음)
+#   • 마지막으로 본 소진율은 파일에 저장해 재시작 후에도 이어감
+#   • 시작 시 저장 파일에 없는 키는 이미 적재된 표(WEEKLY_REPORT/DEPLETION_ROWS)의 값으로 채움
+#     (재시작 직후 첫 적재에서 이미 넘은 임계치를 모두 다시 알리지 않도록)
+#   • 저장 파일에도 표에도 없던 키(새 선박/선적지)는 0%에서 시작한 것으로 보고 비교 — 첫 적재부터 넘은 임계치는 알림
+#   • 이벤트는 크기 제한 outbox에 쌓이고, 백그라운드 전송기가 묶어서 웹훅으로 보냄(재시도 포함)
+#
+# 환경변수
+#   ALERT_WEBHOOK_URL    전송 대상 (없으면 outbox에만 쌓임)
+#   ALERT_THRESHOLDS     "50,80,95"
+#   ALERT_OUTBOX_SIZE    outbox 최대 이벤트 수 (넘치면 오래된 것부터 버림)
+#   ALERT_BATCH_SIZE     한 번에 보낼 최대 이벤트 수
+#   ALERT_FLUSH_SEC      배치를 모으는 최대 대기 시간
+#   ALERT_MAX_RETRIES    배치당 최대 재시도 횟수
+#   ALERT_STATE_PATH     마지막으로 본 소진율 저장 파일 (빈 값이면 메모리에만 — 재시작 후엔 적재된 표 값이 기준)
+#   ALERT_STATE_SAVE_SEC 저장 주기
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+from TAC_data_sources import DEPLETION_ROWS, WEEKLY_REPORT, on_ingest
+
+logger = logging.getLogger(__name__)
+KST = timezone(timedelta(hours=9))
+
+THRESHOLDS = tuple(sorted(int(x) for x in os.environ.get("ALERT_THRESHOLDS", "50,80,95").split(",") if x.strip()))
+OUTBOX_SIZE = int(os.environ.get("ALERT_OUTBOX_SIZE", 10000))
+BATCH_SIZE = int(os.environ.get("ALERT_BATCH_SIZE", 100))
+FLUSH_SEC = float(os.environ.get("ALERT_FLUSH_SEC", 2))
+MAX_RETRIES = int(os.environ.get("ALERT_MAX_RETRIES", 5))
+ALERT_STATE_PATH = os.environ.get("ALERT_STATE_PATH", "/tmp/tac-alert-state.json")
+ALERT_STATE_SAVE_SEC = float(os.environ.get("ALERT_STATE_SAVE_SEC", 60))
+
+_outbox = deque(maxlen=OUTBOX_SIZE)
+_outbox_lock = threading.Lock()
+_wakeup = threading.Event()
+
+STATS = {
+    "rows_scanned": 0,
+    "detect_ns": 0,
+    "events": 0,
+    "dropped": 0,      # outbox가 넘쳐 버려진 이벤트
+    "delivered": 0,
+    "failed": 0,       # 재시도 초과로 버려진 이벤트
+    "seeded": 0,       # 시작 시 적재된 표에서 기준값을 채운 키 수
+}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 검출
+# ──────────────────────────────────────────────────────────────────────────────
+def crossed(old_pct: Optional[float], new_pct: Optional[float]) -> List[int]:
+    """old < t <= new 인 임계치 목록 (소진율이 올라가며 넘은 선만)"""
+    if new_pct is None:
+        return []
+    lo = old_pct if old_pct is not None else float("-inf")
+    return [t for t in THRESHOLDS if lo < t <= new_pct]
+
+def _event(level: str, key, threshold: int, old_pct, new_pct, vessel: Optional[str] = None) -> Dict:
+    sp, industry, port = key
+    ev = {
+        "type": "depletion_threshold",
+        "level": level,
+        "species": sp,
+        "industry": industry,
+        "port": port,
+        "threshold": threshold,
+        "old_pct": old_pct,
+        "new_pct": new_pct,
+        "at": datetime.now(KST).isoformat(timespec="seconds"),
+    }
+    if vessel is not None:
+        ev["vessel"] = vessel
+    return ev
+
+def _push(events: List[Dict]):
+    if not events:
+        return
+    with _outbox_lock:
+        overflow = max(0, len(_outbox) + len(events) - OUTBOX_SIZE)
+        _outbox.extend(events)
+    STATS["events"] += len(events)
+    STATS["dropped"] += overflow
+    _wakeup.set()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 마지막으로 본 소진율 — "어종|업종|선적지" 또는 "어종|업종|선적지|선명" → 소진율
+# ──────────────────────────────────────────────────────────────────────────────
+_last_pct: Dict[str, float] = {}
+_state_lock = threading.Lock()
+_state_dirty = False
+
+def _swap(state_id: str, new_pct) -> Optional[float]:
+    """마지막 값을 new_pct로 바꾸고 이전 값 반환 (처음이면 None)"""
+    global _state_dirty
+    with _state_lock:
+        prev = _last_pct.get(state_id)
+        if prev != new_pct:
+            _last_pct[state_id] = new_pct
+            _state_dirty = True
+    return prev
+
+def _compare(state_id: str, new_pct) -> Optional[float]:
+    """→ 비교 기준(이전 값). 처음 보는 키는 0%에서 시작한 것으로 봄"""
+    if new_pct is None:
+        return None
+    prev = _swap(state_id, new_pct)
+    return 0.0 if prev is None else prev
+
+def seed_state() -> int:
+    """저장 상태에 없는 키를 현재 적재된 표의 값으로 채움 (load_state 뒤, 적재 시작 전에 호출) → 채운 키 수"""
+    seeded = {}
+    for key, data in list(WEEKLY_REPORT.items()):
+        pct = (data or {}).get("배분량소진율")
+        if pct is not None:
+            seeded["|".join(key)] = float(pct)
+    for key, rows in DEPLETION_ROWS.items():
+        base = "|".join(key)
+        for r in rows:
+            pct = r.get("소진율_pct")
+            if pct is not None:
+                seeded[f"{base}|{r.get('선명')}"] = float(pct)
+    global _state_dirty
+    n = 0
+    with _state_lock:
+        for state_id, pct in seeded.items():
+            if state_id not in _last_pct:
+                _last_pct[state_id] = pct
+                n += 1
+        _state_dirty = _state_dirty or n > 0
+    STATS["seeded"] += n
+    return n
+
+def detect(kind: str, key, old, new):
+    """적재 리스너: 마지막으로 본 값과 새 값을 비교해 임계치 통과 이벤트 생성 (old는 쓰지 않음 — 재시작 후엔 샘플 값)"""
+    t0 = time.perf_counter_ns()
+    events: List[Dict] = []
+    base = "|".join(key)
+
+    if kind == "depletion":
+        for r in new or []:
+            name = r.get("선명")
+            new_pct = r.get("소진율_pct")
+            prev = _compare(f"{base}|{name}", new_pct)
+            for t in crossed(prev, new_pct):
+                events.append(_event("vessel", key, t, prev, new_pct, vessel=name))
+        STATS["rows_scanned"] += len(new or [])
+
+    elif kind == "weekly_report":
+        new_pct = (new or {}).get("배분량소진율")
+        prev = _compare(base, new_pct)
+        for t in crossed(prev, new_pct):
+            events.append(_event("port", key, t, prev, new_pct))
+        STATS["rows_scanned"] += 1
+
+    else:
+        return
+
+    STATS["detect_ns"] += time.perf_counter_ns() - t0
+    _push(events)
+
+on_ingest(detect)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 전송
+# ──────────────────────────────────────────────────────────────────────────────
+def _take_batch() -> List[Dict]:
+    with _outbox_lock:
+        n = min(BATCH_SIZE, len(_outbox))
+        return [_outbox.popleft() for _ in range(n)]
+
+def _requeue(batch: List[Dict]):
+    with _outbox_lock:
+        room = OUTBOX_SIZE - len(_outbox)
+        keep = batch[-room:] if room > 0 else []
+        _outbox.extendleft(reversed(keep))
+    STATS["dropped"] += len(batch) - len(keep)
+
+def send_batch(url: str, batch: List[Dict], timeout: float = 5.0) -> bool:
+    try:
+        resp = requests.post(url, json={"events": batch}, timeout=timeout)
+        return 200 <= resp.status_code < 300
+    except requests.RequestException as ex:
+        logger.warning(f"[ALERT] 웹훅 전송 실패: {ex}")
+        return False
+
+def _deliver_loop(url: str, stop: threading.Event):
+    attempt = 0
+    while not stop.is_set():
+        _wakeup.wait(FLUSH_SEC)
+        _wakeup.clear()
+        while not stop.is_set():
+            batch = _take_batch()
+            if not batch:
+                break
+            if send_batch(url, batch):
+                STATS["delivered"] += len(batch)
+                attempt = 0
+                continue
+            attempt += 1
+            if attempt > MAX_RETRIES:
+                logger.error(f"[ALERT] 재시도 초과로 {len(batch)}건 폐기")
+                STATS["failed"] += len(batch)
+                attempt = 0
+                continue
+            _requeue(batch)
+            stop.wait(min(2 ** attempt, 60) * 0.5)
+
+_deliverer = None
+_stop = threading.Event()
+
+def start_delivery(url: Optional[str] = None) -> Optional[threading.Thread]:
+    global _deliverer
+    url = url or os.environ.get("ALERT_WEBHOOK_URL")
+    if not url or (_deliverer and _deliverer.is_alive()):
+        return _deliverer
+    _stop.clear()
+    _deliverer = threading.Thread(target=_deliver_loop, args=(url, _stop), name="tac-alerts", daemon=True)
+    _deliverer.start()
+    return _deliverer
+
+def stop_delivery():
+    _stop.set()
+    _wakeup.set()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 저장/불러오기
+# ──────────────────────────────────────────────────────────────────────────────
+def save_state(path: str = ALERT_STATE_PATH) -> bool:
+    global _state_dirty
+    if not path:
+        return False
+    with _state_lock:
+        if not _state_dirty:
+            return True
+        data = dict(_last_pct)
+        _state_dirty = False
+    try:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return True
+    except OSError as ex:
+        logger.warning(f"[ALERT] 상태 저장 실패: {ex}")
+        with _state_lock:
+            _state_dirty = True
+        return False
+
+def load_state(path: str = ALERT_STATE_PATH) -> bool:
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        with _state_lock:
+            _last_pct.update({k: float(v) for k, v in data.items() if v is not None})
+        return True
+    except (OSError, ValueError, AttributeError) as ex:
+        logger.warning(f"[ALERT] 상태 불러오기 실패: {ex}")
+        return False
+
+_persist_started = False
+
+def start_state_persisting(interval: float = ALERT_STATE_SAVE_SEC):
+    """상태 주기 저장 스레드 시작 (한 번만)"""
+    global _persist_started
+    if _persist_started or not ALERT_STATE_PATH or interval <= 0:
+        return
+    _persist_started = True
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            save_state()
+    threading.Thread(target=loop, name="tac-alert-state", daemon=True).start()
+    atexit.register(save_state)
+
+def alert_stats() -> Dict:
+    rows = STATS["rows_scanned"]
+    return {
+        **STATS,
+        "outbox": len(_outbox),
+        "ns_per_row": round(STATS["detect_ns"] / rows, 1) if rows else None,
+        "thresholds": list(THRESHOLDS),
+        "tracked_keys": len(_last_pct),
+    }
@@ -0,0 +1,139 @@
+# TAC_calendar.py
+# 주차/어기 달력 — 날짜 ↔ (어기, 월, 주차, 토~금 기간)을 미리 계산한 표로 조회
+#
+# 규칙
+#   • 한 주는 토요일~금요일
+#   • 주의 "월/주차"는 그 주 목요일이 속한 달 기준 (목요일이 그 달 몇 번째 목요일인지)
+#   • 어기는 SEASON_START_MONTH(7월) 1일 ~ 익년 6월 말, 해당 주 목요일 기준
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+SEASON_START_MONTH = 7
+FIRST_SEASON = 2015   # 15~16 어기부터
+LAST_SEASON = 2040    # 40~41 어기까지
+
+class Week(NamedTuple):
+    sat: date
+    fri: date
+    year: int      # 목요일 기준 연도
+    month: int     # 목요일 기준 월
+    week: int      # 월 내 주차 (1~5)
+    season: int    # 어기 시작 연도 (예: 2025 → 25~26 어기)
+
+    @property
+    def key(self) -> Tuple[int, int, int]:
+        return (self.year, self.month, self.week)
+
+def season_of(d: date) -> int:
+    return d.year if d.month >= SEASON_START_MONTH else d.year - 1
+
+def season_label(season: int) -> str:
+    return f"({season % 100:02d}~{(season + 1) % 100:02d}년 어기)"
+
+def _build_table():
+    start = date(FIRST_SEASON, SEASON_START_MONTH, 1)
+    first_sat = start - timedelta(days=(start.weekday() - 5) % 7)
+    end = date(LAST_SEASON + 1, SEASON_START_MONTH, 1)
+
+    weeks: List[Week] = []
+    sat = first_sat
+    while sat < end:
+        thu = sat + timedelta(days=5)
+        weeks.append(Week(sat, sat + timedelta(days=6), thu.year, thu.month, (thu.day - 1) // 7 + 1, season_of(thu)))
+        sat += timedelta(days=7)
+
+    by_key: Dict[Tuple[int, int, int], Week] = {w.key: w for w in weeks}
+    by_season: Dict[int, List[Week]] = {}
+    for w in weeks:
+        by_season.setdefault(w.season, []).append(w)
+    return first_sat.toordinal(), weeks, by_key, by_season
+
+_BASE_ORDINAL, WEEKS, _BY_KEY, _BY_SEASON = _build_table()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 조회
+# ──────────────────────────────────────────────────────────────────────────────
+def week_of(d) -> Week:
+    """날짜가 속한 주 (표 범위 밖이면 같은 규칙으로 즉시 계산)"""
+    if isinstance(d, datetime):
+        d = d.date()
+    i = (d.toordinal() - _BASE_ORDINAL) // 7
+    if 0 <= i < len(WEEKS):
+        return WEEKS[i]
+    sat = d - timedelta(days=(d.weekday() - 5) % 7)
+    thu = sat + timedelta(days=5)
+    return Week(sat, sat + timedelta(days=6), thu.year, thu.month, (thu.day - 1) // 7 + 1, season_of(thu))
+
+def find_week(year: int, month: int, week: int) -> Optional[Week]:
+    return _BY_KEY.get((year, month, week))
+
+def weeks_in_season(season: int) -> List[Week]:
+    return list(_BY_SEASON.get(season, []))
+
+def shift_week(w: Week, n: int) -> Week:
+    """w로부터 n주 뒤(음수면 앞)의 주"""
+    return week_of(w.sat + timedelta(days=7 * n))
+
+def season_weeks_left(w: Week) -> int:
+    """w 뒤로 같은 어기에 남은 주 수 (w가 어기 마지막 주면 0)"""
+    thu = w.sat + timedelta(days=5)
+    return ((date(w.season + 1, SEASON_START_MONTH, 1) - thu).days - 1) // 7
+
+def season_week_index(w: Week) -> int:
+    """어기 내 몇 번째 주인지 (1부터)"""
+    weeks = _BY_SEASON.get(w.season)
+    if not weeks:
+        return 1
+    return (w.sat - weeks[0].sat).days // 7 + 1
+
+def latest_week_for(month: int, week: int, ref) -> Optional[Week]:
+    """ref 이전(포함) 가장 최근의 'N월 M주차' (연도 미지정 질의용)"""
+    cur = week_of(ref)
+    for y in (cur.year, cur.year - 1):
+        w = find_week(y, month, week)
+        if w and w.sat <= cur.sat:
+            return w
+    return None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 발화 선택자 파싱: "7월 2주차", "2025년 7월 2주차", "24~25년 어기", "24~25어기"
+# ──────────────────────────────────────────────────────────────────────────────
+_WEEK_SEL_RE = re.compile(r"(?:(\d{2}|\d{4})\s*년\s*)?(\d{1,2})\s*월\s*(\d)\s*주\s*차?")
+_SEASON_SEL_RE = re.compile(r"(\d{2}|\d{4})\s*~\s*(\d{2}|\d{4})\s*년?\s*어기")
+
+def _full_year(y: str) -> int:
+    n = int(y)
+    return n if n >= 100 else 2000 + n
+
+def parse_period_selector(text: str, ref=None):
+    """
+    발화에서 주차/어기 선택자를 떼어내 (남은 발화, 선택자) 반환.
+    선택자: {"week": Week} 또는 {"season": 시작연도} 또는 None
+    주차 선택자 모양인데 그런 주가 없으면("12월 5주차"가 없는 해) {"missing": "2025년 12월 5주차"} —
+    선택자를 남겨 두면 나머지 발화가 현재 주차 조회로 해석되므로 떼어내고 표시
+    """
+    if not text:
+        return text, None
+    ref = ref or datetime.now()
+
+    m = _SEASON_SEL_RE.search(text)
+    if m:
+        season = _full_year(m.group(1))
+        rest = (text[:m.start()] + " " + text[m.end():]).strip()
+        return re.sub(r"\s+", " ", rest), {"season": season}
+
+    m = _WEEK_SEL_RE.search(text)
+    if m:
+        month, idx = int(m.group(2)), int(m.group(3))
+        if m.group(1):
+            w = find_week(_full_year(m.group(1)), month, idx)
+        else:
+            w = latest_week_for(month, idx, ref)
+        rest = re.sub(r"\s+", " ", (text[:m.start()] + " " + text[m.end():]).strip())
+        if w:
+            return rest, {"week": w}
+        year = f"{_full_year(m.group(1))}년 " if m.group(1) else ""
+        return rest, {"missing": f"{year}{month}월 {idx}주차"}
+    return text, None
@@ -0,0 +1,52 @@
+# TAC_chart_render.py
+# 차트 렌더링 함수 — TAC_charts의 작업 프로세스에서만 실행
+#   • import 시 아무 일도 하지 않아야 함 (spawn 작업 프로세스가 이 모듈을 그대로 import)
+#   • pyplot은 함수 안에서 import — 요청 프로세스는 pyplot을 올리지 않음
+
+import os
+import warnings
+from typing import Sequence
+
+KOREAN_FONTS = ["NanumGothic", "Noto Sans CJK KR", "Malgun Gothic", "AppleGothic", "DejaVu Sans"]
+
+def render_depletion_png(path: str, title: str, names: Sequence[str], pcts: Sequence[float],
+                         trend_labels: Sequence[str], trend_values: Sequence[float]) -> str:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib import font_manager
+
+    installed = {f.name for f in font_manager.fontManager.ttflist}
+    plt.rcParams["font.family"] = [f for f in KOREAN_FONTS if f in installed] or ["DejaVu Sans"]
+    plt.rcParams["axes.unicode_minus"] = False
+    warnings.filterwarnings("ignore", message="Glyph .* missing")
+
+    rows = 2 if len(trend_values) >= 2 else 1
+    fig, axes = plt.subplots(rows, 1, figsize=(6, 2.2 + 0.32 * len(names) + (2.4 if rows == 2 else 0)), dpi=110)
+    axes = list(axes) if rows == 2 else [axes]
+
+    ax = axes[0]
+    y = list(range(len(names)))[::-1]
+    colors = ["#d9534f" if p >= 95 else "#f0ad4e" if p >= 80 else "#5bc0de" if p >= 50 else "#5cb85c" for p in pcts]
+    ax.barh(y, pcts, color=colors)
+    ax.set_yticks(y)
+    ax.set_yticklabels(names)
+    ax.set_xlim(0, max(100, max(pcts, default=0) * 1.1))
+    ax.set_xlabel("소진율 (%)")
+    ax.set_title(title)
+    for yi, p in zip(y, pcts):
+        ax.text(p + 1, yi, f"{p:.1f}%", va="center", fontsize=8)
+
+    if rows == 2:
+        ax2 = axes[1]
+        ax2.plot(trend_labels, trend_values, marker="o")
+        ax2.set_ylabel("누계 (kg)")
+        ax2.set_title("주차별 누계 추이")
+        ax2.tick_params(axis="x", labelrotation=45, labelsize=8)
+
+    fig.tight_layout()
+    tmp = path + ".tmp"
+    fig.savefig(tmp, format="png")
+    plt.close(fig)
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,180 @@
+# TAC_charts.py
+# 소진현황 차트 이미지 (선박별 소진율 막대 + 주차별 누계 추이 선)
+#   • 렌더링은 별도 프로세스 풀에서만 수행 — 요청 스레드는 "있으면 URL, 없으면 작업만 걸고 None"
+#   • 파일명에 (키, 데이터 버전)이 들어가므로 같은 이름의 파일은 내용이 바뀌지 않음 → 긴 캐시 헤더 가능
+#   • matplotlib이 없거나 PUBLIC_BASE_URL이 없으면 비활성 (텍스트 응답만)
+#   • 한글 라벨은 서버에 한글 글꼴(예: fonts-nanum)이 있어야 제대로 보임
+#   • 작업 프로세스는 spawn으로 시작 — 요청 스레드가 여럿인 상태에서 fork하면 잠금이 복사돼 교착될 수 있음
+#     spawn은 실행한 스크립트(app.py)를 __mp_main__으로 다시 import하므로, 렌더링 함수는 부작용 없는
+#     TAC_chart_render에 두고 app.py의 백그라운드 작업은 init_app()에서만 시작
+#   • 데이터 버전이 바뀌거나 CHART_PRUNE_SEC마다, 두 버전 전 것과 CHART_MAX_AGE_SEC보다 오래된 이미지를 지움
+#   • 렌더링에 실패한 파일명은 그 데이터 버전 동안 기억 — 다시 작업을 걸지 않고 텍스트 응답(캐시 가능)만
+#
+# 환경변수
+#   CHARTS_ENABLED     "0"이면 끔
+#   CHART_DIR          이미지 저장 위치
+#   CHART_WORKERS      렌더링 프로세스 수
+#   PUBLIC_BASE_URL    카카오가 이미지를 가져갈 외부 주소 (예: https://bot.example.com)
+#   CHART_MAX_VESSELS  막대그래프에 넣을 최대 선박 수 (소진율 높은 순)
+#   CHART_MAX_AGE_SEC  이미지 보관 기간
+#   CHART_PRUNE_SEC    정리 주기
+
+import contextvars
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from TAC_chart_render import render_depletion_png
+
+logger = logging.getLogger(__name__)
+
+try:
+    import matplotlib  # noqa: F401
+    HAS_MATPLOTLIB = True
+except ImportError:
+    HAS_MATPLOTLIB = False
+
+CHART_DIR = os.environ.get("CHART_DIR", "/tmp/tac-charts")
+CHART_WORKERS = int(os.environ.get("CHART_WORKERS", 2))
+PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL", "").rstrip("/")
+CHART_MAX_VESSELS = int(os.environ.get("CHART_MAX_VESSELS", 30))
+CHART_MAX_AGE_SEC = float(os.environ.get("CHART_MAX_AGE_SEC", 8 * 24 * 3600))
+CHART_PRUNE_SEC = float(os.environ.get("CHART_PRUNE_SEC", 3600))
+CHART_ROUTE = "/charts"
+CHARTS_ENABLED = os.environ.get("CHARTS_ENABLED", "1") == "1" and HAS_MATPLOTLIB and bool(PUBLIC_BASE_URL)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending: Dict[str, object] = {}
+_ready = set()
+_failed = set()   # 렌더링 실패한 파일명 (파일명에 버전이 있어 버전이 바뀌면 자연히 새 작업)
+_lock = threading.Lock()
+_latest_version = 0
+_last_prune = 0.0
+_FILENAME_RE = re.compile(r"^[a-z_]+_[0-9a-f]{16}_v(\d+)\.png$")
+
+# 이번 요청에서 이미지가 아직 준비 중이었는지 — 응답 캐시가 텍스트 전용 응답을 굳히지 않도록
+_chart_pending: contextvars.ContextVar = contextvars.ContextVar("tac_chart_pending", default=False)
+
+def reset_chart_pending():
+    _chart_pending.set(False)
+
+def chart_pending() -> bool:
+    return _chart_pending.get()
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 요청 측 (비차단)
+# ──────────────────────────────────────────────────────────────────────────────
+def chart_filename(kind: str, key, version: int) -> str:
+    digest = hashlib.sha1(repr((kind, key)).encode("utf-8")).hexdigest()[:16]
+    return f"{kind}_{digest}_v{version}.png"
+
+def chart_url(filename: str) -> str:
+    return f"{PUBLIC_BASE_URL}{CHART_ROUTE}/{filename}"
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=CHART_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def prune_charts(latest_version: int, now: Optional[float] = None) -> int:
+    """두 버전 이전 또는 CHART_MAX_AGE_SEC보다 오래된 이미지 삭제 (_lock 보유 상태에서 호출) → 지운 파일 수"""
+    now = now or time.time()
+    removed = 0
+    try:
+        names = os.listdir(CHART_DIR)
+    except OSError:
+        return 0
+    for name in names:
+        m = _FILENAME_RE.match(name)
+        if not m or name in _pending:
+            continue
+        path = os.path.join(CHART_DIR, name)
+        try:
+            if int(m.group(1)) < latest_version - 1 or now - os.path.getmtime(path) > CHART_MAX_AGE_SEC:
+                os.remove(path)
+                _ready.discard(name)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+def _maybe_prune(version: int):
+    global _latest_version, _last_prune
+    now = time.time()
+    if version > _latest_version or now - _last_prune > CHART_PRUNE_SEC:
+        _latest_version = max(_latest_version, version)
+        _last_prune = now
+        _failed.difference_update({n for n in _failed if int(_FILENAME_RE.match(n).group(1)) < _latest_version})
+        n = prune_charts(_latest_version, now)
+        if n:
+            logger.info(f"[CHART] 오래된 이미지 {n}개 삭제")
+
+def depletion_chart_url(key, version: int, title: str, rows: List, trend: Optional[List] = None) -> Optional[str]:
+    """
+    이미지가 준비돼 있으면 URL, 아니면 렌더링 작업만 걸고 None.
+    rows: 선박 행(선명/소진율_pct), trend: [(라벨, 누계), ...]
+    """
+    if not CHARTS_ENABLED or not rows:
+        return None
+    filename = chart_filename("depletion", key, version)
+    if filename in _ready:
+        return chart_url(filename)
+    if filename in _failed:
+        return None   # 이번 버전에선 실패 — 대기 표시 없이 텍스트 응답
+
+    path = os.path.join(CHART_DIR, filename)
+    _chart_pending.set(True)
+    with _lock:
+        if filename in _pending:
+            return None
+        if filename in _failed:
+            _chart_pending.set(False)
+            return None
+        if os.path.exists(path):
+            _ready.add(filename)
+            _chart_pending.set(False)
+            return chart_url(filename)
+        os.makedirs(CHART_DIR, exist_ok=True)
+        _maybe_prune(version)
+        top = sorted(rows, key=lambda r: r.get("소진율_pct") or 0, reverse=True)[:CHART_MAX_VESSELS]
+        names = [r.get("선명") or "-" for r in top]
+        pcts = [float(r.get("소진율_pct") or 0) for r in top]
+        labels = [t[0] for t in (trend or [])]
+        values = [float(t[1] or 0) for t in (trend or [])]
+        try:
+            fut = _get_pool().submit(render_depletion_png, path, title, names, pcts, labels, values)
+        except Exception as ex:
+            logger.warning(f"[CHART] 렌더링 작업 등록 실패: {ex}")
+            _chart_pending.set(False)
+            return None
+        _pending[filename] = fut
+
+    def _done(f, filename=filename):
+        ok = f.exception() is None
+        with _lock:
+            _pending.pop(filename, None)
+            (_ready if ok else _failed).add(filename)
+        if not ok:
+            logger.warning(f"[CHART] 렌더링 실패: {filename} ({f.exception()})")
+    fut.add_done_callback(_done)
+    return None
+
+def wait_pending(timeout: float) -> bool:
+    """걸려 있는 렌더링 작업이 모두 끝날 때까지 최대 timeout초 대기 (사전 계산용) → 모두 끝났으면 True"""
+    with _lock:
+        futs = list(_pending.values())
+    if not futs:
+        return True
+    _done, not_done = wait(futs, timeout=timeout)
+    return not not_done
+
+def chart_stats() -> Dict:
+    return {"enabled": CHARTS_ENABLED, "matplotlib": HAS_MATPLOTLIB, "ready": len(_ready), "pending": len(_pending),
+            "failed": len(_failed)}
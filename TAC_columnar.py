@@ -0,0 +1,335 @@
+# TAC_columnar.py
+# 선박별 표의 열(column) 저장소
+#   • 숫자 필드는 필드별 array('d'), 선명은 전역 이름 풀의 정수 ID(array('l'))로 보관
+#   • 키(어종, 업종, 선적지[, 기간])별로 (시작, 끝) 오프셋만 기억
+#   • dict처럼 get/[]=/keys/items를 지원하므로 기존 코드(DEPLETION_ROWS.get(key, []) 등)는 그대로 동작
+#   • 조회 결과는 복사 없는 행 뷰(RowView)이며 r.get("선명"), r["누계"]처럼 dict와 같이 읽힘
+#   • 숫자 칸의 문자열("1,234", "1,234 kg", "3.7%")은 풀어 읽고, 숫자로 읽을 수 없는 값은 ValueError로 적재를 거절
+#
+# 키를 다시 넣으면 새 구간을 뒤에 붙이고 이전 구간은 버려진 칸으로 남습니다.
+# 버려진 칸이 살아있는 칸보다 많아지면 새 배열로 압축합니다(이전 뷰는 이전 배열을 계속 참조하므로 안전).
+
+import heapq
+import itertools
+import math
+import re
+import threading
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+NAME_FIELD = "선명"
+_NAN = float("nan")
+CHUNK_ROWS = 1024   # top_k/filter 사전 필터 블록 크기
+
+# ── 선명 풀 (전 표 공용) ─────────────────────────────────────────────────────
+_names: List[str] = []
+_name_ids: Dict[str, int] = {}
+_names_lock = threading.Lock()
+
+def intern_name(name) -> int:
+    if name is None:
+        return -1
+    i = _name_ids.get(name)
+    if i is None:
+        with _names_lock:
+            i = _name_ids.get(name)
+            if i is None:
+                i = len(_names)
+                _names.append(name)
+                _name_ids[name] = i
+    return i
+
+def name_of(i: int) -> Optional[str]:
+    return _names[i] if i >= 0 else None
+
+_MISSING = {"", "-", "–", "—"}
+_UNIT_RE = re.compile(r"\s*(kg|%)$", re.IGNORECASE)
+
+def _to_float(v) -> float:
+    """
+    숫자 칸 값 → float. 없음(None, "", "-")은 NaN.
+    Sheets/JSON 원본의 "1,234", "1,234 kg", "3.7%" 같은 문자열은 풀어서 읽고, 그 밖의 값은 ValueError
+    """
+    if v is None:
+        return _NAN
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        s = v.strip()
+        if s in _MISSING:
+            return _NAN
+        try:
+            return float(_UNIT_RE.sub("", s).replace(",", "").replace(" ", ""))
+        except ValueError:
+            pass
+    raise ValueError(f"숫자가 아닌 값: {v!r}")
+
+def _from_float(x: float):
+    if x != x:  # NaN
+        return None
+    return int(x) if x.is_integer() else x
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 열 묶음 / 행 뷰
+# ──────────────────────────────────────────────────────────────────────────────
+class _Columns:
+    __slots__ = ("fields", "names", "cols")
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self.names = array("l")
+        self.cols = {f: array("d") for f in self.fields}
+
+    def __len__(self):
+        return len(self.names)
+
+    def append_rows(self, rows: Iterable) -> Tuple[int, int]:
+        # 먼저 전부 변환 — 중간 행에서 ValueError가 나도 열 길이가 어긋나지 않도록
+        parsed = []
+        for n, r in enumerate(rows):
+            try:
+                parsed.append((r.get(NAME_FIELD), [_to_float(r.get(f)) for f in self.fields]))
+            except ValueError as ex:
+                raise ValueError(f"{n}번째 행({r.get(NAME_FIELD)}): {ex}") from None
+        lo = len(self.names)
+        for name, values in parsed:
+            self.names.append(intern_name(name))
+            for f, x in zip(self.fields, values):
+                self.cols[f].append(x)
+        return lo, len(self.names)
+
+    def copy_range(self, src: "_Columns", lo: int, hi: int) -> Tuple[int, int]:
+        start = len(self.names)
+        self.names.extend(src.names[lo:hi])
+        for f in self.fields:
+            self.cols[f].extend(src.cols[f][lo:hi])
+        return start, len(self.names)
+
+class RowView:
+    """한 행에 대한 읽기 전용 뷰 (값은 열 배열에서 바로 읽음)"""
+    __slots__ = ("_c", "_i")
+
+    def __init__(self, cols: _Columns, i: int):
+        self._c = cols
+        self._i = i
+
+    def get(self, field, default=None):
+        if field == NAME_FIELD:
+            return name_of(self._c.names[self._i])
+        col = self._c.cols.get(field)
+        if col is None:
+            return default
+        v = _from_float(col[self._i])
+        return default if v is None else v
+
+    def __getitem__(self, field):
+        if field != NAME_FIELD and field not in self._c.cols:
+            raise KeyError(field)
+        return self.get(field)
+
+    def __contains__(self, field):
+        return field == NAME_FIELD or field in self._c.cols
+
+    def keys(self):
+        return (NAME_FIELD,) + self._c.fields
+
+    def items(self):
+        return [(k, self.get(k)) for k in self.keys()]
+
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, (RowView, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, RowView) else other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"RowView({self.to_dict()!r})"
+
+class RowsView(Sequence):
+    """키 하나의 행들에 대한 뷰 (list처럼 len/반복/인덱싱/슬라이싱 가능)"""
+    __slots__ = ("_c", "_lo", "_hi")
+
+    def __init__(self, cols: _Columns, lo: int, hi: int):
+        self._c, self._lo, self._hi = cols, lo, hi
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            lo, hi, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(lo, hi, step)]
+            return RowsView(self._c, self._lo + lo, self._lo + max(lo, hi))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return RowView(self._c, self._lo + i)
+
+    def __iter__(self) -> Iterator[RowView]:
+        c = self._c
+        for i in range(self._lo, self._hi):
+            yield RowView(c, i)
+
+    def column(self, field: str) -> array:
+        """필드 값 배열 (구간 슬라이스 — 이 구간만큼만 복사)"""
+        return self._c.cols[field][self._lo:self._hi]
+
+    def __repr__(self):
+        return f"RowsView({[r.to_dict() for r in self]!r})"
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 표
+# ──────────────────────────────────────────────────────────────────────────────
+class VesselTable:
+    """키 → 선박 행 목록을 열 배열로 보관하는 dict 호환 표"""
+
+    def __init__(self, fields: Sequence[str], rows_by_key: Optional[Dict] = None):
+        self.fields = tuple(f for f in fields if f != NAME_FIELD)
+        # (열 묶음, 키→구간) — 압축 시 통째로 교체되므로 읽는 쪽은 한 번에 꺼내 씀
+        self._state: Tuple[_Columns, Dict[tuple, Tuple[int, int]]] = (_Columns(self.fields), {})
+        self._garbage = 0
+        self._lock = threading.Lock()
+        for key, rows in (rows_by_key or {}).items():
+            self[key] = rows
+
+    # ── dict 호환 ───────────────────────────────────────────────────────────
+    def __setitem__(self, key, rows):
+        with self._lock:
+            cols, index = self._state
+            lo, hi = cols.append_rows(rows)
+            old = index.get(key)
+            index[key] = (lo, hi)
+            if old:
+                self._garbage += old[1] - old[0]
+            if self._garbage > 1024 and self._garbage > len(cols) - self._garbage:
+                self._compact()
+
+    def __getitem__(self, key) -> RowsView:
+        cols, index = self._state
+        return RowsView(cols, *index[key])
+
+    def get(self, key, default=None):
+        cols, index = self._state
+        span = index.get(key)
+        if span is None:
+            return default
+        return RowsView(cols, *span)
+
+    def __delitem__(self, key):
+        with self._lock:
+            lo, hi = self._state[1].pop(key)
+            self._garbage += hi - lo
+
+    def __contains__(self, key):
+        return key in self._state[1]
+
+    def __len__(self):
+        return len(self._state[1])
+
+    def __iter__(self):
+        return iter(list(self._state[1]))
+
+    def keys(self):
+        return list(self._state[1])
+
+    def items(self):
+        cols, index = self.snapshot()
+        return [(k, RowsView(cols, lo, hi)) for k, (lo, hi) in index.items()]
+
+    def values(self):
+        return [v for _, v in self.items()]
+
+    def _compact(self):
+        cols, index = self._state
+        new = _Columns(self.fields)
+        new_index = {key: new.copy_range(cols, lo, hi) for key, (lo, hi) in index.items()}
+        self._state, self._garbage = (new, new_index), 0
+
+    # ── 열 단위 연산 ────────────────────────────────────────────────────────
+    def snapshot(self) -> Tuple[_Columns, Dict[tuple, Tuple[int, int]]]:
+        """(열 묶음, 키→구간) — 한 시점의 일관된 상태 (대량 계산용)"""
+        with self._lock:
+            cols, index = self._state
+            return cols, dict(index)
+
+    def _spans(self, key=None, where: Optional[Callable[[tuple], bool]] = None):
+        """(열 묶음, 대상 구간 목록) — 전체 조회이고 버려진 칸이 없으면 열 전체 한 구간으로 합침"""
+        cols, index = self.snapshot()
+        if key is not None:
+            span = index.get(key)
+            return cols, ([span] if span else [])
+        if where is None:
+            if sum(hi - lo for lo, hi in index.values()) == len(cols):
+                return cols, [(0, len(cols))]
+            return cols, list(index.values())
+        return cols, [span for k, span in index.items() if where(k)]
+
+    # 구간 슬라이스 단위로 C 구현(fsum/max/nlargest)에 넘겨 행별 파이썬 루프를 줄임.
+    # 결측(NaN)은 구간에 있을 때만 걸러냄.
+    def sum(self, field: str, key=None, where: Optional[Callable[[tuple], bool]] = None) -> float:
+        cols, spans = self._spans(key, where)
+        col = cols.cols[field]
+        total = 0.0
+        for lo, hi in spans:
+            seg = col[lo:hi]
+            s = math.fsum(seg)
+            total += s if s == s else math.fsum(x for x in seg if x == x)
+        return total
+
+    def _chunk_maxes(self, col: array, spans) -> List[Tuple[float, int, array]]:
+        """[(블록 최댓값, 시작 칸, 블록 값)] — 값 비교 전에 최댓값으로 블록째 걸러내기 위한 숫자 사전 필터 (결측 제외)"""
+        out = []
+        for lo, hi in spans:
+            seg = col[lo:hi]
+            total = sum(seg)
+            clean = total == total
+            for i in range(0, len(seg), CHUNK_ROWS):
+                c = seg[i:i + CHUNK_ROWS]
+                m = max(c) if clean else max((x for x in c if x == x), default=None)
+                if m is not None:
+                    out.append((m, lo + i, c))
+        return out
+
+    def top_k(self, field: str, k: int, key=None, where: Optional[Callable[[tuple], bool]] = None) -> List[RowView]:
+        if k <= 0:
+            return []
+        cols, spans = self._spans(key, where)
+        col = cols.cols[field]
+        chunks = self._chunk_maxes(col, spans)
+        # k번째 값 ≥ 블록 최댓값들 중 k번째 → 그보다 작은 최댓값의 블록은 볼 필요 없음
+        floor = heapq.nlargest(k, (m for m, _, _ in chunks))[-1] if len(chunks) >= k else -math.inf
+        cand = [(x, i) for m, start, c in chunks if m >= floor for i, x in enumerate(c, start) if x >= floor]
+        cand.sort(key=lambda p: -p[0])
+        return [RowView(cols, i) for _, i in cand[:k]]
+
+    def filter(self, field: str, pred: Optional[Callable[[float], bool]] = None, key=None,
+               where: Optional[Callable[[tuple], bool]] = None,
+               min_value: Optional[float] = None, max_value: Optional[float] = None) -> List[RowView]:
+        """
+        min_value <= 값 <= max_value 이고 pred(값)이 참인 행 (결측 NaN은 제외)
+        임계값 조회("소진율 95% 이상")는 min_value로 — 숫자 비교만 하므로 dict 순회와 비슷하거나 조금 빠름.
+        pred만 주면 행마다 파이썬 함수를 불러 dict 순회보다 느립니다(20만 행 기준 약 2배).
+        """
+        cols, spans = self._spans(key, where)
+        col = cols.cols[field]
+        if min_value is None and max_value is None:
+            pred = pred or (lambda x: x == x)
+            return [RowView(cols, i) for lo, hi in spans for i in itertools.compress(range(lo, hi), map(pred, col[lo:hi]))]
+        lo_v = -math.inf if min_value is None else float(min_value)
+        if max_value is None:
+            idx = [i for lo, hi in spans for i, x in enumerate(col[lo:hi], lo) if x >= lo_v]
+        else:
+            hi_v = float(max_value)
+            idx = [i for lo, hi in spans for i, x in enumerate(col[lo:hi], lo) if lo_v <= x <= hi_v]
+        if pred is not None:
+            idx = [i for i in idx if pred(col[i])]
+        return [RowView(cols, i) for i in idx]
+
+    def memory_bytes(self) -> int:
+        """열 배열이 차지하는 바이트 수 (이름 풀/인덱스 제외)"""
+        c = self._state[0]
+        return c.names.itemsize * len(c.names) + sum(a.itemsize * len(a) for a in c.cols.values())
@@ -3,7 +3,16 @@
 # → 초기엔 인메모리 샘플, 이후 Google Sheets/JSON/DB로 교체 시
 #    아래 함수들 내부만 바꾸면 됩니다.
 
-from typing import Dict, List, Optional, Tuple
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from TAC_calendar import Week, week_of, weeks_in_season
+from TAC_columnar import VesselTable
+from TAC_resilience import guarded
+
+logger = logging.getLogger(__name__)
 
 # ── 주간보고(요약) ───────────────────────────────────────────────────────────
 # 키: (어종, 업종, 선적지)
@@ -22,8 +31,14 @@ WEEKLY_REPORT: Dict[Tuple[str, str, str], Dict] = {
     }
 }
 
+# ── 선박별 표 ────────────────────────────────────────────────────────────────
+# 선박별 행은 VesselTable(열 배열 저장소, TAC_columnar 참고)에 보관합니다.
+# dict와 같은 방식으로 읽고 쓰며, 조회 결과는 r.get("선명")처럼 읽는 행 뷰입니다.
+DEPLETION_FIELDS = ["선명", "할당량", "금주소진량", "누계", "잔량", "소진율_pct"]
+CATCH_FIELDS = ["선명", "주어종어획량", "부수어획어획량"]
+
 # ── 소진현황(선박별) ─────────────────────────────────────────────────────────
-DEPLETION_ROWS: Dict[Tuple[str, str, str], List[Dict]] = {
+DEPLETION_ROWS = VesselTable(DEPLETION_FIELDS, {
     ("살오징어", "근해채낚기", "부산"): [
         {"선명":"민기호","할당량":27_670,"금주소진량":0,"누계":2_591.6,"잔량":27_670.0,"소진율_pct":3.7},
         {"선명":"민지호","할당량":70_750,"금주소진량":516,"누계":2_863.0,"잔량":68_158.4,"소진율_pct":3.7},
@@ -31,7 +46,7 @@ DEPLETION_ROWS: Dict[Tuple[str, str, str], List[Dict]] = {
         {"선명":"훈녕호","할당량":64_200,"금주소진량":0,"누계":630.0,"잔량":63_570.0,"소진율_pct":1.0},
         {"선명":"진수호","할당량":93_600,"금주소진량":0,"누계":889.0,"잔량":92_711.0,"소진율_pct":0.9},
     ]
-}
+})
 
 # ── 어획량(선박별) 포맷 — 주간/시즌 공통 ─────────────────────────────────────
 # 요청 포맷:
@@ -39,31 +54,230 @@ DEPLETION_ROWS: Dict[Tuple[str, str, str], List[Dict]] = {
 #   주어종 어획량: xx kg
 #   부수어획 어획량: xx kg
 # 동일 포맷으로 주간/전체기간 모두 구성합니다.
-VESSEL_WEEKLY_CATCH: Dict[Tuple[str, str, str], List[Dict]] = {
+VESSEL_WEEKLY_CATCH = VesselTable(CATCH_FIELDS, {
     ("살오징어", "근해채낚기", "부산"): [
         {"선명":"민기호",      "주어종어획량": 420.0, "부수어획어획량": 18.0},
         {"선명":"민지호","주어종어획량": 516.0, "부수어획어획량": 22.0},
         {"선명":"귀원호",      "주어종어획량": 148.0, "부수어획어획량": 9.0},
     ]
-}
+})
 
-VESSEL_SEASON_CATCH: Dict[Tuple[str, str, str], List[Dict]] = {
+VESSEL_SEASON_CATCH = VesselTable(CATCH_FIELDS, {
     ("살오징어", "근해채낚기", "부산"): [
         {"선명":"민기호",      "주어종어획량": 2_591.6, "부수어획어획량": 110.0},
         {"선명":"민지호","주어종어획량": 2_863.0, "부수어획어획량": 135.0},
         {"선명":"귀원호",      "주어종어획량": 3_017.5, "부수어획어획량": 128.0},
     ]
-}
+})
+
+# ── 과거 기간 데이터 ─────────────────────────────────────────────────────────
+# 위 표들은 "현재 주차/현재 어기" 값입니다.
+# 지난 주차는 (어종, 업종, 선적지, (연, 월, 주차)), 지난 어기는 (어종, 업종, 선적지, 어기시작연도)로 보관합니다.
+WeekKey = Tuple[int, int, int]
+WEEKLY_REPORT_HISTORY: Dict[Tuple[str, str, str, WeekKey], Dict] = {}
+DEPLETION_ROWS_HISTORY = VesselTable(DEPLETION_FIELDS)          # 키: (어종, 업종, 선적지, WeekKey)
+VESSEL_WEEKLY_CATCH_HISTORY = VesselTable(CATCH_FIELDS)         # 키: (어종, 업종, 선적지, WeekKey)
+VESSEL_SEASON_CATCH_HISTORY = VesselTable(CATCH_FIELDS)         # 키: (어종, 업종, 선적지, 어기시작연도)
 
 # ── 공개 인터페이스 ──────────────────────────────────────────────────────────
-def get_weekly_report(fish_norm: str, industry: str, port: str) -> Optional[Dict]:
+# week/season 미지정 → 현재 값, 지정 → 과거 기간 표에서 조회
+# 모든 조회는 @guarded로 보호됩니다 (마감시각/마지막 정상 값/회로 차단기, TAC_resilience 참고).
+@guarded("weekly_report")
+def get_weekly_report(fish_norm: str, industry: str, port: str, week: Optional[Week] = None) -> Optional[Dict]:
+    if week is not None:
+        return WEEKLY_REPORT_HISTORY.get((fish_norm, industry, port, week.key))
     return WEEKLY_REPORT.get((fish_norm, industry, port))
 
-def get_depletion_rows(fish_norm: str, industry: str, port: str) -> List[Dict]:
+@guarded("depletion_rows", list)
+def get_depletion_rows(fish_norm: str, industry: str, port: str, week: Optional[Week] = None) -> List[Dict]:
+    if week is not None:
+        return DEPLETION_ROWS_HISTORY.get((fish_norm, industry, port, week.key), [])
     return DEPLETION_ROWS.get((fish_norm, industry, port), [])
 
-def get_weekly_vessel_catch(fish_norm: str, industry: str, port: str) -> List[Dict]:
+@guarded("weekly_vessel_catch", list)
+def get_weekly_vessel_catch(fish_norm: str, industry: str, port: str, week: Optional[Week] = None) -> List[Dict]:
+    if week is not None:
+        return VESSEL_WEEKLY_CATCH_HISTORY.get((fish_norm, industry, port, week.key), [])
     return VESSEL_WEEKLY_CATCH.get((fish_norm, industry, port), [])
 
-def get_season_vessel_catch(fish_norm: str, industry: str, port: str) -> List[Dict]:
+@guarded("season_vessel_catch", list)
+def get_season_vessel_catch(fish_norm: str, industry: str, port: str, season: Optional[int] = None) -> List[Dict]:
+    if season is not None:
+        return VESSEL_SEASON_CATCH_HISTORY.get((fish_norm, industry, port, season), [])
     return VESSEL_SEASON_CATCH.get((fish_norm, industry, port), [])
+
+# ── 대량 순회(내보내기용) ────────────────────────────────────────────────────
+# 표 이름 → (현재 표, 과거 표). 과거 표의 키 마지막 원소는 (연, 월, 주차) 또는 어기 시작연도.
+EXPORT_TABLES = {
+    "depletion": (DEPLETION_ROWS, DEPLETION_ROWS_HISTORY),
+    "weekly": (VESSEL_WEEKLY_CATCH, VESSEL_WEEKLY_CATCH_HISTORY),
+    "season": (VESSEL_SEASON_CATCH, VESSEL_SEASON_CATCH_HISTORY),
+}
+
+def iter_table_rows(table: str, species: Optional[str] = None, industry: Optional[str] = None,
+                    port: Optional[str] = None, period=None, include_current: bool = True,
+                    include_history: bool = True):
+    """
+    (어종, 업종, 선적지, 기간, 행)을 하나씩 내보냄. 기간은 현재 표의 행이면 None.
+    period를 주면 과거 표에서 그 기간(Week.key 또는 어기 시작연도)만 순회합니다.
+    현재 기간만 원하면 include_history=False.
+    키 목록만 복사하므로 순회 중 적재가 일어나도 안전하고 메모리는 행 수와 무관합니다.
+    """
+    current, history = EXPORT_TABLES[table]
+
+    def match(sp, ind, pt):
+        return (species is None or sp == species) and (industry is None or ind == industry) and (port is None or pt == port)
+
+    if include_current and period is None:
+        for key in list(current.keys()):
+            if match(*key):
+                for row in current.get(key, []):
+                    yield key[0], key[1], key[2], None, row
+    if not include_history:
+        return
+    for key in list(history.keys()):
+        sp, ind, pt, per = key
+        if match(sp, ind, pt) and (period is None or per == period):
+            for row in history.get(key, []):
+                yield sp, ind, pt, per, row
+
+def depletion_trend(fish_norm: str, industry: str, port: str, upto: Week,
+                    current: Optional[Week] = None) -> List[Tuple[Week, float]]:
+    """
+    어기 첫 주부터 upto 주까지 주차별 선적지 누계 합 (데이터 없는 주는 건너뜀).
+    current 주는 현재 표에서, 나머지는 과거 표에서 읽습니다. (차트 보조용 — 보호 호출 아님)
+    """
+    out = []
+    for w in weeks_in_season(upto.season):
+        if w.sat > upto.sat:
+            break
+        if current is not None and w == current:
+            key, table = (fish_norm, industry, port), DEPLETION_ROWS
+        else:
+            key, table = (fish_norm, industry, port, w.key), DEPLETION_ROWS_HISTORY
+        if key in table:
+            out.append((w, table.sum("누계", key=key)))
+    return out
+
+# ── 데이터 버전/갱신 알림 ────────────────────────────────────────────────────
+# 데이터를 교체(업로드/재적재)한 뒤 mark_updated()를 호출하면 버전이 올라가고
+# 등록된 리스너(캐시 워밍 등)가 호출됩니다.
+DATA_VERSION = 1
+_UPDATE_LISTENERS: List[Callable[[int], None]] = []
+
+def data_version() -> int:
+    return DATA_VERSION
+
+def on_data_update(callback: Callable[[int], None]) -> Callable[[int], None]:
+    _UPDATE_LISTENERS.append(callback)
+    return callback
+
+def mark_updated() -> int:
+    global DATA_VERSION
+    DATA_VERSION += 1
+    for cb in list(_UPDATE_LISTENERS):
+        try:
+            cb(DATA_VERSION)
+        except Exception as ex:
+            logger.warning(f"[WARN] 데이터 갱신 리스너 실패: {cb} ({ex})")
+    return DATA_VERSION
+
+# ── 적재(ingest) ─────────────────────────────────────────────────────────────
+# 업로드/동기화 작업은 키 단위로 아래 함수를 호출한 뒤 마지막에 mark_updated()를 한 번 호출합니다.
+# 적재 리스너는 (종류, 키, 이전 값, 새 값)을 받아 변경분만 처리합니다(임계치 알림 등).
+_INGEST_LISTENERS: List[Callable[[str, Tuple[str, str, str], object, object], None]] = []
+
+def on_ingest(callback):
+    _INGEST_LISTENERS.append(callback)
+    return callback
+
+def _notify_ingest(kind: str, key: Tuple[str, str, str], old, new):
+    for cb in list(_INGEST_LISTENERS):
+        try:
+            cb(kind, key, old, new)
+        except Exception as ex:
+            logger.warning(f"[WARN] 적재 리스너 실패: {cb} ({ex})")
+
+def ingest_weekly_report(fish_norm: str, industry: str, port: str, data: Dict, week: Optional[Week] = None):
+    """week를 주면 과거 표에 그 주차 값으로 적재 (현재 표·적재 리스너는 건드리지 않음)"""
+    if week is not None:
+        WEEKLY_REPORT_HISTORY[(fish_norm, industry, port, week.key)] = data
+        return
+    roll_week()
+    key = (fish_norm, industry, port)
+    old = WEEKLY_REPORT.get(key)
+    WEEKLY_REPORT[key] = data
+    _notify_ingest("weekly_report", key, old, data)
+
+def ingest_depletion_rows(fish_norm: str, industry: str, port: str, rows: List[Dict], week: Optional[Week] = None):
+    if week is not None:
+        DEPLETION_ROWS_HISTORY[(fish_norm, industry, port, week.key)] = rows
+        return
+    roll_week()
+    key = (fish_norm, industry, port)
+    old = DEPLETION_ROWS.get(key, [])
+    DEPLETION_ROWS[key] = rows
+    _notify_ingest("depletion", key, old, rows)
+
+def ingest_weekly_vessel_catch(fish_norm: str, industry: str, port: str, rows: List[Dict],
+                               week: Optional[Week] = None):
+    if week is not None:
+        VESSEL_WEEKLY_CATCH_HISTORY[(fish_norm, industry, port, week.key)] = rows
+        return
+    roll_week()
+    key = (fish_norm, industry, port)
+    old = VESSEL_WEEKLY_CATCH.get(key, [])
+    VESSEL_WEEKLY_CATCH[key] = rows
+    _notify_ingest("weekly_catch", key, old, rows)
+
+def ingest_season_vessel_catch(fish_norm: str, industry: str, port: str, rows: List[Dict],
+                               season: Optional[int] = None):
+    """season(어기 시작연도)을 주면 과거 표에 적재"""
+    if season is not None:
+        VESSEL_SEASON_CATCH_HISTORY[(fish_norm, industry, port, season)] = rows
+        return
+    roll_week()
+    key = (fish_norm, industry, port)
+    old = VESSEL_SEASON_CATCH.get(key, [])
+    VESSEL_SEASON_CATCH[key] = rows
+    _notify_ingest("season_catch", key, old, rows)
+
+# ── 주차 전환 보관 ───────────────────────────────────────────────────────────
+# 현재 표는 CURRENT_WEEK 주차의 값입니다. 주차가 바뀌면(자정 스케줄러 또는 새 주차의 첫 적재)
+# 현재 표를 통째로 과거 표에 그 주차 키로 복사하고, 어기가 바뀌었으면 시즌 어획량도 지난 어기로 복사합니다.
+# 현재 표는 새 값이 적재될 때까지 그대로 둡니다(새 주차 보고 전까지는 직전 값 안내).
+KST = timezone(timedelta(hours=9))
+CURRENT_WEEK: Optional[Week] = None
+_roll_lock = threading.Lock()
+
+def archive_current(week: Week, season: Optional[int] = None) -> int:
+    """현재 표를 week(와 season)의 과거 값으로 복사 → 복사한 키 수"""
+    n = 0
+    for key, data in list(WEEKLY_REPORT.items()):
+        WEEKLY_REPORT_HISTORY[key + (week.key,)] = dict(data)
+        n += 1
+    for current, history in ((DEPLETION_ROWS, DEPLETION_ROWS_HISTORY), (VESSEL_WEEKLY_CATCH, VESSEL_WEEKLY_CATCH_HISTORY)):
+        for key in list(current.keys()):
+            history[key + (week.key,)] = [r.to_dict() for r in current.get(key, [])]
+            n += 1
+    if season is not None:
+        for key in list(VESSEL_SEASON_CATCH.keys()):
+            VESSEL_SEASON_CATCH_HISTORY[key + (season,)] = [r.to_dict() for r in VESSEL_SEASON_CATCH.get(key, [])]
+            n += 1
+    return n
+
+def roll_week(now=None) -> bool:
+    """now가 CURRENT_WEEK보다 뒤 주차면 현재 표를 보관하고 CURRENT_WEEK를 옮김 (앞으로만) → 보관했으면 True"""
+    global CURRENT_WEEK
+    w = week_of(now or datetime.now(KST))
+    with _roll_lock:
+        if CURRENT_WEEK is None:
+            CURRENT_WEEK = w
+            return False
+        if w.sat <= CURRENT_WEEK.sat:
+            return False
+        prev = CURRENT_WEEK
+        n = archive_current(prev, season=prev.season if w.season != prev.season else None)
+        CURRENT_WEEK = w
+    logger.info(f"[ROLL] {prev.key} → {w.key}: 현재 표 {n}개 키 보관")
+    return True
@@ -0,0 +1,61 @@
+# TAC_export.py
+# 선박별 표(소진현황/주간·시즌 어획량)를 CSV 또는 NDJSON으로 스트리밍
+#   • 행을 하나씩 읽어 EXPORT_CHUNK_ROWS 행 단위로 문자열 덩어리를 내보냄 → 메모리는 결과 크기와 무관
+#   • CSV는 스프레드시트에서 한글이 깨지지 않도록 UTF-8 BOM으로 시작
+
+import csv
+import io
+import json
+import os
+from typing import Iterator
+
+from TAC_data_sources import iter_table_rows
+
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 1000))
+
+EXPORT_FIELDS = {
+    "depletion": ["선명", "할당량", "금주소진량", "누계", "잔량", "소진율_pct"],
+    "weekly": ["선명", "주어종어획량", "부수어획어획량"],
+    "season": ["선명", "주어종어획량", "부수어획어획량"],
+}
+KEY_FIELDS = ["어종", "업종", "선적지", "기간"]
+
+def _period_label(table: str, period, current_label: str) -> str:
+    if period is None:
+        return current_label
+    if table == "season":
+        return f"{period}~{period + 1}"
+    y, m, w = period
+    return f"{y}-{m:02d}-{w}"
+
+def export_rows(table: str, fmt: str = "csv", current_label: str = "", **filters) -> Iterator[str]:
+    fields = EXPORT_FIELDS[table]
+    rows = iter_table_rows(table, **filters)
+
+    if fmt == "ndjson":
+        buf = []
+        for sp, ind, pt, period, row in rows:
+            rec = {"어종": sp, "업종": ind, "선적지": pt, "기간": _period_label(table, period, current_label)}
+            for f in fields:
+                rec[f] = row.get(f)
+            buf.append(json.dumps(rec, ensure_ascii=False))
+            if len(buf) >= EXPORT_CHUNK_ROWS:
+                yield "\n".join(buf) + "\n"
+                buf.clear()
+        if buf:
+            yield "\n".join(buf) + "\n"
+        return
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    out.write("\ufeff")
+    writer.writerow(KEY_FIELDS + fields)
+    n = 0
+    for sp, ind, pt, period, row in rows:
+        writer.writerow([sp, ind, pt, _period_label(table, period, current_label)] + [row.get(f) for f in fields])
+        n += 1
+        if n % EXPORT_CHUNK_ROWS == 0:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate(0)
+    yield out.getvalue()
@@ -0,0 +1,85 @@
+# TAC_forecast.py
+# 할당량 소진 예측 — 데이터 적재 후 전 선박/선적지/업종을 한 번에 계산해 보관
+#
+# 주당 소진 속도 = (금주소진량 + 어기 평균 주간소진량) / 2
+#   어기 평균 주간소진량 = 누계 / 어기 경과 주수
+# 예상 소진 주 = 현재 주 + ceil(잔량 / 주당 속도)   (속도 0 → 예측 없음)
+# 할당량은 어기 단위이므로 예상 소진 주가 이번 어기를 넘으면 "어기 내 소진 없음"으로 표시
+
+import math
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from TAC_calendar import Week, season_week_index, season_weeks_left, shift_week, week_of
+from TAC_columnar import name_of
+from TAC_data_sources import DEPLETION_ROWS, data_version
+
+Key = Tuple[str, str, str]
+
+# 계산 결과 (run_forecast가 통째로 교체)
+FORECASTS: Dict[Key, Dict] = {}                 # (어종, 업종, 선적지) → {"vessels": [...], "total": {...}}
+INDUSTRY_FORECASTS: Dict[Tuple[str, str], Dict] = {}  # (어종, 업종) → {...}
+FORECAST_META: Dict = {"data_version": None, "week": None}
+
+def _weeks_left(remaining: float, pace: float) -> Optional[int]:
+    if remaining <= 0:
+        return 0
+    if pace <= 0:
+        return None
+    return math.ceil(remaining / pace)
+
+def _entry(remaining: float, pace: float, cur: Week) -> Dict:
+    weeks_left = _weeks_left(remaining, pace)
+    # 어기를 넘기면 소진 주를 계산하지 않음 (속도가 아주 느리면 날짜 범위를 벗어남)
+    in_season = weeks_left is not None and weeks_left <= season_weeks_left(cur)
+    return {
+        "잔량": remaining,
+        "주당소진량": round(pace, 1),
+        "남은주수": weeks_left,
+        "소진예상주": shift_week(cur, weeks_left) if in_season else None,
+        "어기내소진": in_season,
+    }
+
+def _summary(remaining: float, this_week: float, cumulative: float, elapsed: int, cur: Week) -> Dict:
+    return _entry(remaining, (this_week + cumulative / elapsed) / 2, cur)
+
+def run_forecast(ref_date=None) -> Dict:
+    """DEPLETION_ROWS 전체를 열(column) 배열 단위로 한 번에 예측"""
+    global FORECASTS, INDUSTRY_FORECASTS
+    cur = week_of(ref_date or datetime.now())
+    elapsed = season_week_index(cur)
+
+    # 1) 열 배열 (VesselTable의 열을 그대로 사용, 키별 구간은 index)
+    cols, index = DEPLETION_ROWS.snapshot()
+    keys: List[Key] = list(index)
+    offsets = [index[k] for k in keys]
+    remaining, this_week, cumulative = (
+        array("d", (0.0 if x != x else x for x in cols.cols[f])) for f in ("잔량", "금주소진량", "누계")
+    )
+
+    # 2) 선박별 주당 속도 (열 단위 한 번의 순회)
+    pace = array("d", [(tw + cu / elapsed) / 2 for tw, cu in zip(this_week, cumulative)])
+
+    # 3) 선적지/업종 합계
+    forecasts: Dict[Key, Dict] = {}
+    industry_acc: Dict[Tuple[str, str], List[float]] = {}
+    for k, key in enumerate(keys):
+        lo, hi = offsets[k]
+        vessels = [{"선명": name_of(cols.names[i]), **_entry(remaining[i], pace[i], cur)} for i in range(lo, hi)]
+        tot = (sum(remaining[lo:hi]), sum(this_week[lo:hi]), sum(cumulative[lo:hi]))
+        forecasts[key] = {"vessels": vessels, "total": _summary(*tot, elapsed, cur)}
+        acc = industry_acc.setdefault(key[:2], [0.0, 0.0, 0.0])
+        for j in range(3):
+            acc[j] += tot[j]
+
+    FORECASTS = forecasts
+    INDUSTRY_FORECASTS = {k: _summary(*acc, elapsed, cur) for k, acc in industry_acc.items()}
+    FORECAST_META.update(data_version=data_version(), week=cur)
+    return FORECAST_META
+
+def get_forecast(fish_norm: str, industry: str, port: str) -> Optional[Dict]:
+    return FORECASTS.get((fish_norm, industry, port))
+
+def get_industry_forecast(fish_norm: str, industry: str) -> Optional[Dict]:
+    return INDUSTRY_FORECASTS.get((fish_norm, industry))
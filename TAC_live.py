@@ -0,0 +1,183 @@
+# TAC_live.py
+# 소진현황 실시간 피드 (Server-Sent Events)
+#   • 키(어종, 업종, 선적지)마다 피드 하나를 구독자 전원이 공유
+#   • 구독 시 전체 스냅샷 1회, 이후 소진현황이 적재될 때마다 바뀐 선박 행만 전송
+#   • 변경분은 적재 시 한 번만 계산·인코딩해 피드의 최근 이벤트 버퍼에 넣고, 구독자는 그 바이트를 그대로 씀
+#   • 구독자 깨우기는 전용 스레드 하나에서 순서대로 처리 → 적재 호출은 구독자 수와 무관하게 바로 반환
+#   • 재접속(Last-Event-ID)은 버퍼에 남은 이벤트로 이어받고, 너무 오래됐으면 스냅샷부터 다시 보냄
+#
+# 구독자 하나가 작업 스레드 하나를 연결 내내 점유합니다(WSGI 스트리밍). 그래서
+#   • 구독자 수 기본 상한은 작업 스레드의 일부(WORKER_THREADS // 4)로만 둠
+#   • 구독자도 /TAC 입장 제어(rate_limiter)의 동시 처리 건수에 포함 → 구독자가 늘면 /TAC가 먼저 거절 응답으로 전환,
+#     스레드가 모두 묶여 /TAC가 멈추는 일은 없음
+# 구독자가 많이 필요하면 /TAC와 분리된 프로세스(gunicorn --threads 크게, ADMISSION_MAX_INFLIGHT=0,
+# LIVE_MAX_SUBSCRIBERS 지정)로 띄우세요.
+#
+# 환경변수
+#   WORKER_THREADS         gunicorn --threads 값 (기본 구독자 상한 계산용)
+#   LIVE_MAX_SUBSCRIBERS   프로세스당 최대 구독자 수 (초과 시 503, 기본 WORKER_THREADS // 4)
+#   LIVE_HEARTBEAT_SEC     변경이 없을 때 연결 유지용 주석(": ping") 간격
+#   LIVE_BACKLOG           재접속 이어받기용으로 피드마다 보관할 최근 이벤트 수
+
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import rate_limiter
+from TAC_data_sources import DEPLETION_FIELDS, on_ingest
+
+WORKER_THREADS = int(os.environ.get("WORKER_THREADS", 16))
+LIVE_MAX_SUBSCRIBERS = int(os.environ.get("LIVE_MAX_SUBSCRIBERS", max(1, WORKER_THREADS // 4)))
+LIVE_HEARTBEAT_SEC = float(os.environ.get("LIVE_HEARTBEAT_SEC", 15))
+LIVE_BACKLOG = int(os.environ.get("LIVE_BACKLOG", 32))
+
+NAME_FIELD = "선명"
+VALUE_FIELDS = tuple(f for f in DEPLETION_FIELDS if f != NAME_FIELD)
+PING = b": ping\n\n"
+
+STATS = {"subscribed": 0, "rejected": 0, "events": 0, "rows_sent": 0}
+
+def _row_map(rows) -> Dict[str, tuple]:
+    """선박 행 목록 → {선명: 값 튜플} (dict 행과 RowView 모두 가능)"""
+    return {r.get(NAME_FIELD): tuple(r.get(f) for f in VALUE_FIELDS) for r in rows or []}
+
+def _row_json(name: str, values: tuple) -> Dict:
+    return {NAME_FIELD: name, **dict(zip(VALUE_FIELDS, values))}
+
+def _sse(event: str, seq: int, payload: Dict) -> bytes:
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {seq}\nevent: {event}\ndata: {data}\n\n".encode("utf-8")
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 키별 공유 피드
+# ──────────────────────────────────────────────────────────────────────────────
+class Feed:
+    def __init__(self, key: Tuple[str, str, str], rows):
+        self.key = key
+        self.rows = _row_map(rows)
+        self.seq = 0
+        self.events: deque = deque(maxlen=LIVE_BACKLOG)   # (seq, 인코딩된 이벤트)
+        self.subscribers = 0
+        self.cond = threading.Condition()
+
+    def snapshot_event(self) -> bytes:
+        """현재 전체 행 (cond 보유 상태에서 호출)"""
+        return _sse("snapshot", self.seq, {
+            "key": list(self.key),
+            "rows": [_row_json(n, v) for n, v in self.rows.items()],
+        })
+
+    def publish(self, rows) -> bool:
+        """새 행 목록과 비교해 바뀐 행/빠진 선박만 이벤트로 발행 (변경 없으면 False)"""
+        new = _row_map(rows)
+        with self.cond:
+            changed = [_row_json(n, v) for n, v in new.items() if self.rows.get(n) != v]
+            removed = [n for n in self.rows if n not in new]
+            if not changed and not removed:
+                return False
+            self.rows = new
+            self.seq += 1
+            self.events.append((self.seq, _sse("diff", self.seq, {"changed": changed, "removed": removed})))
+            STATS["events"] += 1
+            STATS["rows_sent"] += (len(changed) + len(removed)) * self.subscribers
+            self.cond.notify_all()
+        return True
+
+    def since(self, seq: int) -> Optional[List[bytes]]:
+        """seq 이후 이벤트들 (버퍼에서 이미 밀려났으면 None → 스냅샷 필요) — cond 보유 상태에서 호출"""
+        if seq == self.seq:
+            return []
+        if not self.events or self.events[0][0] > seq + 1 or seq > self.seq:
+            return None
+        return [b for s, b in self.events if s > seq]
+
+FEEDS: Dict[Tuple[str, str, str], Feed] = {}
+_feeds_lock = threading.Lock()
+_subscribers = 0
+_fanout = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tac-live")
+
+def _acquire(key, rows) -> Optional[Feed]:
+    global _subscribers
+    with _feeds_lock:
+        if _subscribers >= LIVE_MAX_SUBSCRIBERS or not rate_limiter.try_admit():
+            STATS["rejected"] += 1
+            return None
+        feed = FEEDS.get(key)
+        if feed is None:
+            feed = FEEDS[key] = Feed(key, rows)
+        feed.subscribers += 1
+        _subscribers += 1
+        STATS["subscribed"] += 1
+        return feed
+
+def _release(feed: Feed):
+    global _subscribers
+    with _feeds_lock:
+        feed.subscribers -= 1
+        _subscribers -= 1
+        if feed.subscribers == 0 and FEEDS.get(feed.key) is feed:
+            del FEEDS[feed.key]   # 구독자가 없으면 피드를 버리고, 다음 구독 때 현재 값으로 새로 만듦
+    rate_limiter.release()
+
+@on_ingest
+def _on_ingest(kind: str, key, old, new):
+    if kind != "depletion":
+        return
+    feed = FEEDS.get(key)
+    if feed is not None:
+        _fanout.submit(feed.publish, list(new))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 구독 (스트리밍 응답 본문)
+# ──────────────────────────────────────────────────────────────────────────────
+class Subscription:
+    """SSE 본문(반복 가능 객체). WSGI 서버가 연결 종료 시 close()를 부르면 구독 해제 — 시작 전에 끊겨도 안전"""
+
+    def __init__(self, feed: Feed, last_event_id: Optional[int]):
+        self.feed = feed
+        self.last_event_id = last_event_id
+        self._released = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        feed = self.feed
+        with feed.cond:
+            pending = feed.since(self.last_event_id) if self.last_event_id is not None else None
+            first = b"".join(pending) if pending is not None else feed.snapshot_event()
+            seq = feed.seq
+        yield b"retry: 3000\n\n" + first
+        while True:
+            with feed.cond:
+                if feed.seq == seq:
+                    feed.cond.wait(LIVE_HEARTBEAT_SEC)
+                pending = feed.since(seq)
+                chunk = feed.snapshot_event() if pending is None else b"".join(pending)
+                seq = feed.seq
+            yield chunk or PING
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            _release(self.feed)
+
+def subscribe(key: Tuple[str, str, str], rows, last_event_id: Optional[int] = None) -> Optional[Subscription]:
+    """
+    키 구독. 구독자 수 상한에 걸리면 None.
+    rows: 피드가 아직 없을 때 초기 스냅샷으로 쓸 현재 행
+    """
+    feed = _acquire(key, rows)
+    if feed is None:
+        return None
+    return Subscription(feed, last_event_id)
+
+def live_stats() -> Dict:
+    return {
+        **STATS,
+        "subscribers": _subscribers,
+        "feeds": len(FEEDS),
+        "max_subscribers": LIVE_MAX_SUBSCRIBERS,
+        "worker_threads": WORKER_THREADS,
+        "heartbeat_sec": LIVE_HEARTBEAT_SEC,
+    }
@@ -0,0 +1,211 @@
+# TAC_resilience.py
+# 운영 데이터 호출 보호 — 요청 마감시간 / stale-while-revalidate / 회로 차단기
+#
+#   • 요청마다 begin_request(마감시각)을 호출하면, 데이터 호출은 남은 예산 안에서만 기다립니다.
+#     요청이 끝나면 end_request(토큰)으로 되돌립니다 (스레드 재사용 시 다음 요청에 새지 않도록).
+#   • 마감을 넘기면 마지막 정상 값을 (경과 시간 표시와 함께) 돌려주고, 호출은 백그라운드에서 계속 진행되어
+#     끝나는 대로 마지막 정상 값을 갱신합니다. 같은 인자에 대한 호출은 하나만 진행됩니다.
+#   • 연속 실패(예외/마감 초과)가 DS_BREAKER_FAILURES 회 이상이면 DS_BREAKER_COOLDOWN_SEC 동안
+#     백엔드를 호출하지 않고 마지막 정상 값만 제공합니다. 이후 한 번의 시험 호출로 복구 여부를 확인합니다.
+#
+# 환경변수
+#   REQUEST_BUDGET_MS        요청 전체 예산 (카카오 스킬 타임아웃 5초 기준)
+#   DS_RENDER_MARGIN_MS      렌더링/응답 전송용으로 남겨둘 시간
+#   DS_CALL_TIMEOUT_MS       마감시각이 없을 때(배치/워밍 등) 호출당 대기 시간
+#   DS_WORKERS               백엔드 호출 스레드 수
+
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+REQUEST_BUDGET_MS = float(os.environ.get("REQUEST_BUDGET_MS", 4500))
+DS_RENDER_MARGIN_MS = float(os.environ.get("DS_RENDER_MARGIN_MS", 300))
+DS_CALL_TIMEOUT_MS = float(os.environ.get("DS_CALL_TIMEOUT_MS", 3000))
+DS_MIN_WAIT_MS = 20
+DS_WORKERS = int(os.environ.get("DS_WORKERS", 8))
+DS_BREAKER_FAILURES = int(os.environ.get("DS_BREAKER_FAILURES", 5))
+DS_BREAKER_COOLDOWN_SEC = float(os.environ.get("DS_BREAKER_COOLDOWN_SEC", 30))
+DS_LAST_GOOD_MAX = int(os.environ.get("DS_LAST_GOOD_MAX", 10000))
+
+_pool = ThreadPoolExecutor(max_workers=DS_WORKERS, thread_name_prefix="tac-ds")
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 요청 마감시각 / 응답 신선도
+# ──────────────────────────────────────────────────────────────────────────────
+_deadline: contextvars.ContextVar = contextvars.ContextVar("tac_deadline", default=None)
+_stale_age: contextvars.ContextVar = contextvars.ContextVar("tac_stale_age", default=None)
+
+def begin_request(deadline: Optional[float] = None):
+    """요청 시작 시 호출: 마감시각(monotonic) 설정, 신선도 표시 초기화 → end_request에 넘길 토큰"""
+    return _deadline.set(deadline), _stale_age.set(None)
+
+def end_request(token):
+    """요청 끝(finally)에서 호출 — gthread는 스레드를 재사용하므로 마감시각이 다음 요청으로 새지 않게 되돌림"""
+    deadline_token, stale_token = token
+    _deadline.reset(deadline_token)
+    _stale_age.reset(stale_token)
+
+def request_deadline_from_now() -> float:
+    return time.monotonic() + REQUEST_BUDGET_MS / 1000
+
+def reset_staleness():
+    _stale_age.set(None)
+
+def stale_age() -> Optional[float]:
+    """이번 요청에서 마지막 정상 값으로 대체된 데이터 중 가장 오래된 것의 경과 초 (없으면 None)"""
+    return _stale_age.get()
+
+def _mark_stale(age: Optional[float]):
+    cur = _stale_age.get()
+    age = age if age is not None else float("inf")
+    _stale_age.set(age if cur is None else max(cur, age))
+
+def _wait_seconds() -> float:
+    deadline = _deadline.get()
+    if deadline is None:
+        return DS_CALL_TIMEOUT_MS / 1000
+    remaining = deadline - time.monotonic() - DS_RENDER_MARGIN_MS / 1000
+    return max(DS_MIN_WAIT_MS / 1000, remaining)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 회로 차단기
+# ──────────────────────────────────────────────────────────────────────────────
+class CircuitBreaker:
+    def __init__(self, failures: int = DS_BREAKER_FAILURES, cooldown: float = DS_BREAKER_COOLDOWN_SEC):
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.threshold:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.failures < self.threshold:
+                return True
+            if time.monotonic() < self.open_until or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True   # half-open: 시험 호출 1회
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.threshold:
+                self.open_until = time.monotonic() + self.cooldown
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 보호된 데이터 호출
+# ──────────────────────────────────────────────────────────────────────────────
+GUARDS: Dict[str, "Guard"] = {}
+
+class Guard:
+    def __init__(self, name: str, default_factory: Callable):
+        self.name = name
+        self.default_factory = default_factory
+        self.breaker = CircuitBreaker()
+        self.last_good: "OrderedDict[tuple, tuple]" = OrderedDict()   # key → (값, 저장시각)
+        self.inflight: Dict[tuple, object] = {}
+        self.stats = {"calls": 0, "fresh": 0, "stale": 0, "timeouts": 0, "errors": 0, "short_circuited": 0}
+        self._lock = threading.Lock()
+
+    def _store(self, key, value):
+        with self._lock:
+            self.last_good[key] = (value, time.monotonic())
+            self.last_good.move_to_end(key)
+            while len(self.last_good) > DS_LAST_GOOD_MAX:
+                self.last_good.popitem(last=False)
+
+    def _serve_stale(self, key):
+        self.stats["stale"] += 1
+        hit = self.last_good.get(key)
+        if hit is None:
+            _mark_stale(None)
+            return self.default_factory()
+        value, saved_at = hit
+        _mark_stale(time.monotonic() - saved_at)
+        return value
+
+    def _submit(self, key, backend, args, kwargs):
+        with self._lock:
+            fut = self.inflight.get(key)
+            if fut is not None:
+                return fut
+            fut = _pool.submit(backend, *args, **kwargs)
+            self.inflight[key] = fut
+
+        def _done(f, key=key):
+            with self._lock:
+                self.inflight.pop(key, None)
+            if f.exception() is None:
+                self._store(key, f.result())   # 마감 후 끝난 호출도 마지막 정상 값 갱신
+        fut.add_done_callback(_done)
+        return fut
+
+    def call(self, backend, args, kwargs):
+        self.stats["calls"] += 1
+        key = (args, tuple(sorted(kwargs.items())))
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            return self._serve_stale(key)
+
+        fut = self._submit(key, backend, args, kwargs)
+        try:
+            value = fut.result(timeout=_wait_seconds())
+        except FutureTimeout:
+            self.stats["timeouts"] += 1
+            self.breaker.failure()
+            logger.warning(f"[DS] {self.name}{args} 마감 초과 → 마지막 정상 값 제공")
+            return self._serve_stale(key)
+        except Exception as ex:
+            self.stats["errors"] += 1
+            self.breaker.failure()
+            logger.warning(f"[DS] {self.name}{args} 실패 → 마지막 정상 값 제공 ({ex})")
+            return self._serve_stale(key)
+
+        self.breaker.success()
+        self.stats["fresh"] += 1
+        return value
+
+def guarded(name: str, default_factory: Callable = lambda: None):
+    """
+    데이터 조회 함수를 보호 호출로 감쌈.
+    실제 조회는 wrapper.backend를 호출하므로, 백엔드 교체 시 이 속성만 바꾸면 됩니다.
+    """
+    def deco(fn):
+        guard = GUARDS[name] = Guard(name, default_factory)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return guard.call(wrapper.backend, args, kwargs)
+
+        wrapper.backend = fn
+        wrapper.guard = guard
+        return wrapper
+    return deco
+
+def resilience_stats() -> Dict:
+    return {
+        name: {**g.stats, "breaker": g.breaker.state, "last_good": len(g.last_good), "inflight": len(g.inflight)}
+        for name, g in GUARDS.items()
+    }
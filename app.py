@@ -1,28 +1,75 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, send_from_directory
 from datetime import datetime, timezone, timedelta
-import logging, os, re, calendar
+import logging, os, re, calendar, json, time, threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
-from fish_data import fish_data
-from fish_utils import normalize_fish_name, get_fish_info
+from species_registry import SPECIES, get_species
+from fish_utils import (
+    normalize_fish_name, get_fish_info, get_multi_fish_info, applicable_rule, extract_scope, extract_rule_type,
+    extract_species,
+)
 
 # TAC 메타데이터
 from TAC_data import (
-    TAC_DATA,
-    is_tac_species,
-    get_display_name as tac_display,
     get_industries,
     get_ports,
     all_industries_union,
     all_ports_union,
 )
 
+# 주차/어기 달력
+from TAC_calendar import week_of, season_label, parse_period_selector, find_week
+
 # 운영 데이터
 from TAC_data_sources import (
     get_weekly_report,
     get_depletion_rows,
     get_weekly_vessel_catch,
     get_season_vessel_catch,
+    data_version,
+    on_data_update,
+    roll_week,
+    depletion_trend,
+)
+
+# 소진 예측
+from TAC_forecast import FORECAST_META, run_forecast, get_forecast, get_industry_forecast
+
+# 소진율 임계치 알림
+from TAC_alerts import (
+    alert_stats, start_delivery, load_state as load_alert_state, seed_state as seed_alert_state, start_state_persisting,
+)
+
+# 사용자별 대화 맥락
+import session_store
+from session_store import get_context, set_context, session_stats
+
+# 요청 프로파일링
+from request_profiler import should_profile, run_profiled, save_profile
+
+# 데이터 호출 보호 (마감시각/마지막 정상 값/회로 차단기)
+from TAC_resilience import (
+    begin_request, end_request, request_deadline_from_now, reset_staleness, stale_age, resilience_stats,
+)
+
+# 내보내기
+from TAC_export import EXPORT_FIELDS, export_rows
+
+# 과부하 보호 (사용자별 토큰 버킷 / 전역 입장 제어)
+from rate_limiter import allow_user, try_admit, release, limiter_stats
+
+# 발화 빈도 집계
+import utterance_stats
+from utterance_stats import top_utterances
+
+# 소진현황 실시간 피드 (SSE)
+from TAC_live import subscribe, live_stats
+
+# 소진현황 차트 이미지
+from TAC_charts import (
+    CHART_DIR, CHART_ROUTE, depletion_chart_url, reset_chart_pending, chart_pending, chart_stats, wait_pending,
 )
 
 app = Flask(__name__)
@@ -35,21 +82,6 @@ logger = logging.getLogger(__name__)
 KST = timezone(timedelta(hours=9))
 MAX_QR = 10
 
-display_name_map = {
-    "조피볼락(우럭)": "조피볼락",
-    "넙치(광어)": "넙치",
-    "전복(전복류)": "전복",
-    "제주소라": "제주소라",
-}
-
-fish_emojis = {
-    "대게": "🦀", "붉은대게": "🦀", "꽃게": "🦀",
-    "오분자기": "🐚", "키조개": "🦪", "제주소라": "🐚",
-    "주꾸미": "🐙", "대문어": "🐙", "참문어": "🐙",
-    "낙지": "🦑", "살오징어": "🦑",
-    "해삼": "🌊", "넓미역": "🌿", "우뭇가사리": "🌿", "톳": "🌿",
-}
-
 BASE_MENU = [
     {"label": "📅 오늘 금어기", "action": "message", "messageText": "오늘 금어기 알려줘"},
     {"label": "🗓️ 월 금어기",  "action": "message", "messageText": "8월 금어기 알려줘"},
@@ -65,26 +97,14 @@ _MONTH_END = {m: calendar.monthrange(2024, m)[1] for m in range(1, 13)}
 # 주차/기간 유틸
 # ──────────────────────────────────────────────────────────────────────────────
 def week_range_and_index_for(date: datetime):
-    delta_to_sat = (date.weekday() - 5) % 7
-    sat = (date - timedelta(days=delta_to_sat)).date()
-    fri = sat + timedelta(days=6)
-    thu = sat + timedelta(days=5)
-
-    first_day = thu.replace(day=1)
-    first_thu = first_day
-    while first_thu.weekday() != 3:  # Thu=3
-        first_thu += timedelta(days=1)
-
-    week_idx = 1 + (thu - first_thu).days // 7
-    return sat, fri, thu.month, week_idx, thu.year
+    w = week_of(date)
+    return w.sat, w.fri, w.month, w.week, w.year
 
 def fmt_period_line(sat, fri):
     return f"({sat.strftime('%Y.%m.%d')}~{fri.strftime('%m.%d')})"
 
 def season_label_from_year(y: int):
-    a = y % 100
-    b = (y + 1) % 100
-    return f"({a:02d}~{b:02d}년 어기)"
+    return season_label(y)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 공용 유틸
@@ -92,12 +112,20 @@ def season_label_from_year(y: int):
 def cap_quick_replies(buttons):
     return (buttons or [])[:MAX_QR]
 
-def build_response(text, buttons=None):
+def build_response(text, buttons=None, image_url=None, image_alt=""):
     tpl = {"version":"2.0","template":{"outputs":[{"simpleText":{"text":text}}]}}
+    if image_url:
+        tpl["template"]["outputs"].append({"simpleImage": {"imageUrl": image_url, "altText": image_alt}})
     if buttons:
         tpl["template"]["quickReplies"] = cap_quick_replies(buttons)
     return tpl
 
+# 관리자 인증 — X-Admin-Token 헤더가 ADMIN_TOKEN과 같아야 함 (미설정 시 비활성)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+def is_admin(req) -> bool:
+    return bool(ADMIN_TOKEN) and req.headers.get("X-Admin-Token") == ADMIN_TOKEN
+
 def fmt_num(v):
     if v is None:
         return "-"
@@ -110,23 +138,16 @@ def fmt_num(v):
 # ──────────────────────────────────────────────────────────────────────────────
 from TAC_data import get_aliases as tac_aliases
 def resolve_tac_key(fish_norm: str):
-    if is_tac_species(fish_norm):
-        return fish_norm
-    for sp, meta in TAC_DATA.items():
-        disp = meta.get("display")
-        aliases = set(meta.get("aliases", []))
-        if fish_norm == sp or fish_norm == disp or fish_norm in aliases:
-            return sp
-    return None
+    sp = get_species(fish_norm)
+    return sp.tac_key if sp else None
 
-def display_name(fish_norm: str) -> str:
-    sp = resolve_tac_key(fish_norm)
-    if sp:
-        return tac_display(sp)
-    return display_name_map.get(fish_norm, fish_norm)
+def display_name(fish_norm) -> str:
+    sp = get_species(fish_norm)
+    return sp.display if sp else fish_norm
 
-def get_emoji(name: str) -> str:
-    return fish_emojis.get(name, "🐟")
+def get_emoji(name) -> str:
+    sp = get_species(name)
+    return sp.emoji if sp else "🐟"
 
 # ──────────────────────────────────────────────────────────────────────────────
 # TAC 버튼/파서
@@ -178,6 +199,11 @@ def build_port_detail_buttons(fish_norm: str, industry: str, port: str):
             "action": "message",
             "messageText": f"{disp} {industry} {port} 전체기간 어획량",
         },
+        {
+            "label": "🔮 소진 예측",
+            "action": "message",
+            "messageText": f"{disp} {industry} {port} 소진 예측",
+        },
         {
             "label": "◀︎ 선적지 목록",
             "action": "message",
@@ -209,7 +235,7 @@ def parse_tac_triplet(text: str):
     intent = parse_detail_intent(t)
     if intent:
         # 의도 키워드 빼고 앞부분만 남김
-        for suffix in ["소진현황", "주간별 어획량", "전체기간 어획량"]:
+        for suffix in ["소진현황", "주간별 어획량", "전체기간 어획량", "주간보고", "소진 예측", "소진예측"]:
             if t.endswith(suffix):
                 t = t[: -len(suffix)].strip()
                 break
@@ -230,6 +256,8 @@ def parse_detail_intent(text: str):
     if t.endswith("소진현황"): return "depletion"
     if t.endswith("주간별 어획량"): return "weekly_ts"
     if t.endswith("전체기간 어획량"): return "season_total"
+    if t.endswith("주간보고"): return "weekly_report"
+    if t.endswith("소진 예측") or t.endswith("소진예측"): return "forecast"
     return None
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -250,33 +278,55 @@ def _in_range(md, start_md, end_md):
     if (sm, sd) <= (em, ed): return (sm, sd) <= (m, d) <= (em, ed)
     return (m, d) >= (sm, sd) or (m, d) <= (em, ed)
 
-_PARSED_PERIODS = []
+def _parse_period(period: str):
+    """'6.1~8.31', '12.1~익년 1.31' → ((sm, sd), (em, ed)), 해석 불가 시 None"""
+    if not period or "~" not in period: return None
+    start, end = [p.strip() for p in period.split("~", 1)]
+    sm, sd = _parse_md(start); em, ed = _parse_md(end)
+    if "." not in start: sd = 1
+    if "." not in end: ed = _MONTH_END.get(em, 31)
+    if 1 <= sm <= 12 and 1 <= em <= 12:
+        return (sm, sd), (em, ed)
+    return None
+
+# 금어기 달력은 어종 ID 기준 — 같은 어종의 중복 기록(전복/전복류 등)은 한 번만 나옴
+_PARSED_PERIODS = []   # [(어종 ID, 시작(월, 일), 끝(월, 일))]
 def _prepare_periods():
     global _PARSED_PERIODS
     parsed = []
-    for name, info in fish_data.items():
-        period = (info or {}).get("금어기")
-        if not period or "~" not in period: continue
+    for sp in SPECIES:
+        period = (sp.record or {}).get("금어기")
         try:
-            start, end = [p.strip() for p in period.split("~", 1)]
-            sm, sd = _parse_md(start); em, ed = _parse_md(end)
-            if "." not in start: sd = 1
-            if "." not in end: ed = _MONTH_END.get(em, 31)
-            if 1 <= sm <= 12 and 1 <= em <= 12:
-                parsed.append((name, (sm, sd), (em, ed)))
+            p = _parse_period(period)
+            if p: parsed.append((sp.id, p[0], p[1]))
         except Exception as ex:
-            logger.warning(f"[WARN] 금어기 파싱 실패: {name} - {period} ({ex})")
+            logger.warning(f"[WARN] 금어기 파싱 실패: {sp.key} - {period} ({ex})")
     _PARSED_PERIODS = parsed
 _prepare_periods()
 
 @lru_cache(maxsize=370)
 def today_banned_fishes_cached(month: int, day: int):
+    """→ 어종 ID 튜플"""
     md = (month, day); banned = []
-    for name, start_md, end_md in _PARSED_PERIODS:
+    for sid, start_md, end_md in _PARSED_PERIODS:
         try:
-            if _in_range(md, start_md, end_md): banned.append(name)
+            if _in_range(md, start_md, end_md): banned.append(sid)
         except Exception: pass
-    return banned
+    return tuple(banned)
+
+@lru_cache(maxsize=1024)
+def banned_fishes_in_region_cached(month: int, day: int, region: str):
+    """지역 금어기가 있으면 그것을, 없으면 전국 금어기를 적용 (규제 색인 직접 조회) → 어종 ID 튜플"""
+    md = (month, day); banned = []
+    for sp in SPECIES:
+        if sp.record is None: continue
+        rule = applicable_rule(sp.id, "금어기", region=region)
+        if rule is None: continue
+        try:
+            p = _parse_period(rule.value)
+            if p and _in_range(md, p[0], p[1]): banned.append(sp.id)
+        except Exception: pass
+    return tuple(banned)
 
 def build_fish_buttons(fishes):
     return [{"label": display_name(n), "action": "message", "messageText": display_name(n)} for n in fishes[:MAX_QR]]
@@ -301,10 +351,10 @@ def extract_month_query(text: str):
 # ──────────────────────────────────────────────────────────────────────────────
 # 렌더러
 # ──────────────────────────────────────────────────────────────────────────────
-def render_weekly_report(fish_norm, industry, port, data, ref_date=None):
+def render_weekly_report(fish_norm, industry, port, data, ref_date=None, week=None):
     if not ref_date:
         ref_date = datetime.now(KST)
-    sat, fri, m, week_idx, _ = week_range_and_index_for(ref_date)
+    sat, fri, _, m, week_idx, _ = week or week_of(ref_date)
     period_line = fmt_period_line(sat, fri)
 
     if not data:
@@ -330,10 +380,10 @@ def render_weekly_report(fish_norm, industry, port, data, ref_date=None):
         lines.append(f"• 누락량: {fmt_num(data.get('누락량'))} kg")
     return "\n".join(lines)
 
-def render_depletion_summary(fish_norm, industry, port, rows, ref_date=None, top_n=8):
+def render_depletion_summary(fish_norm, industry, port, rows, ref_date=None, top_n=8, week=None):
     if not ref_date:
         ref_date = datetime.now(KST)
-    sat, fri, m, week_idx, _ = week_range_and_index_for(ref_date)
+    sat, fri, _, m, week_idx, _ = week or week_of(ref_date)
     period_line = fmt_period_line(sat, fri)
     disp = display_name(fish_norm)
 
@@ -352,10 +402,10 @@ def render_depletion_summary(fish_norm, industry, port, rows, ref_date=None, top
         )
     return "\n".join(lines).strip()
 
-def render_weekly_vessel_catch(fish_norm, industry, port, rows, ref_date=None):
+def render_weekly_vessel_catch(fish_norm, industry, port, rows, ref_date=None, week=None):
     if not ref_date:
         ref_date = datetime.now(KST)
-    sat, fri, m, week_idx, _ = week_range_and_index_for(ref_date)
+    sat, fri, _, m, week_idx, _ = week or week_of(ref_date)
     period_line = fmt_period_line(sat, fri)
     disp = display_name(fish_norm)
 
@@ -371,17 +421,18 @@ def render_weekly_vessel_catch(fish_norm, industry, port, rows, ref_date=None):
         )
     return "\n".join(lines).strip()
 
-def render_season_vessel_catch(fish_norm, industry, port, rows, ref_date=None):
+def render_season_vessel_catch(fish_norm, industry, port, rows, ref_date=None, season=None):
     if not ref_date:
         ref_date = datetime.now(KST)
-    _, _, _, _, y = week_range_and_index_for(ref_date)
-    label = season_label_from_year(y)
+    if season is None:
+        season = week_of(ref_date).season
+    label = season_label(season)
     disp = display_name(fish_norm)
 
     if not rows:
         return f"🗂 {disp} {industry} — {port} 전체기간 어획량\n{label}\n\n데이터 준비중입니다."
 
-    lines = [f"🗂{port} 전체기간 어획량", "(25~26어기)", ""]
+    lines = [f"🗂{port} 전체기간 어획량", label, ""]
     for r in rows:
         lines.append(
             f"⚓{r.get('선명')}\n"
@@ -390,6 +441,48 @@ def render_season_vessel_catch(fish_norm, industry, port, rows, ref_date=None):
         )
     return "\n".join(lines).strip()
 
+def fmt_week_short(w):
+    return f"{w.month}월 {w.week}주차({w.sat.strftime('%m.%d')}~{w.fri.strftime('%m.%d')})"
+
+def fmt_forecast_line(fc):
+    if fc["남은주수"] == 0:
+        return "이미 소진"
+    if fc["남은주수"] is None:
+        return "소진 예상 없음 (최근 소진 없음)"
+    if not fc["어기내소진"]:
+        return "이번 어기 내 소진 예상 없음"
+    return f"{fmt_week_short(fc['소진예상주'])} 소진 예상 ({fc['남은주수']}주 후)"
+
+def render_depletion_forecast(fish_norm, industry, port, fc, ref_date=None, industry_fc=None):
+    if not ref_date:
+        ref_date = datetime.now(KST)
+    sat, fri, m, week_idx, _ = week_range_and_index_for(ref_date)
+    period_line = fmt_period_line(sat, fri)
+    disp = display_name(fish_norm)
+
+    if not fc:
+        return f"🔮 {disp} {industry} — {port} 소진 예측\n{period_line}\n\n데이터 준비중입니다."
+
+    tot = fc["total"]
+    lines = [
+        f"🔮{port} 소진 예측",
+        period_line,
+        "",
+        f"선적지 합계: 잔량 {fmt_num(tot['잔량'])} kg, 주당 {fmt_num(tot['주당소진량'])} kg",
+        f"→ {fmt_forecast_line(tot)}",
+    ]
+    if industry_fc:
+        lines.append(f"{industry} 전체: {fmt_forecast_line(industry_fc)}")
+    lines.append("")
+    for v in fc["vessels"]:
+        lines.append(
+            f"⚓{v.get('선명')}\n"
+            f"잔량: {fmt_num(v['잔량'])} kg\n"
+            f"주당 소진: {fmt_num(v['주당소진량'])} kg\n"
+            f"{fmt_forecast_line(v)}\n"
+        )
+    return "\n".join(lines).strip()
+
 # ──────────────────────────────────────────────────────────────────────────────
 # 도움말
 # ──────────────────────────────────────────────────────────────────────────────
@@ -398,140 +491,833 @@ HELP_TEXT = (
     "• '오늘 금어기' → 오늘 금어기 어종 목록\n"
     "• '8월 금어기 알려줘' → 해당 월 금어기 어종\n"
     "• 어종명을 입력하면 상세 규제(금어기/금지체장 등)를 안내합니다.\n"
+    "• '갈치 고등어 참조기 금어기'처럼 여러 어종을 한 번에 물어볼 수도 있습니다.\n"
+    "• '제주 소라 금어기', '갈치 근해채낚기 금어기', '오늘 제주 금어기'처럼 지역·업종별로도 물어볼 수 있습니다.\n"
     "• TAC 어종은 'TAC 살오징어' → 업종 → 선적지 → 주간보고/소진현황/어획량으로 탐색하세요.\n"
+    "• 선적지를 한 번 고른 뒤에는 '소진현황', '주간별 어획량', '울산'처럼 짧게 물어봐도 됩니다.\n"
+    "• 지난 기간은 '7월 2주차 … 주간보고', '24~25년 어기 … 전체기간 어획량'처럼 물어보세요.\n"
 )
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 라우트 (카카오 스킬 엔드포인트: /TAC)
 # ──────────────────────────────────────────────────────────────────────────────
-@app.route("/TAC", methods=["POST"])
-def fishbot():
+def route(user_text: str, today=None):
+    """발화를 (의도, 슬롯)으로 해석 — 응답 생성 전 단계"""
+    t = (user_text or "").strip()
+    today = today or datetime.now(KST)
+
+    if "도움말" in t:
+        return "help", {}
+    if is_today_ban_query(t):
+        region, _industry = extract_scope(t, extra_regions=all_ports_union())
+        return "today_ban", ({"region": region} if region else {})
+    m = extract_month_query(t)
+    if m is not None:
+        return "month_ban", {"month": m}
+
+    # ① [기간] <어종> <업종> <선적지> (+세부 의도) — "7월 2주차", "24~25년 어기" 선택자 허용
+    t_rest, period = parse_period_selector(t, today)
+    trip = parse_tac_triplet(t_rest)
+    if trip:
+        sp, industry, port = trip
+        detail = parse_detail_intent(t_rest) or "weekly_report"
+        slots = {"species": sp, "industry": industry, "port": port, "detail": detail}
+        # 없는 주차("2025년 2월 6주차") → 현재 값을 보여주지 않고 안내
+        if period and "missing" in period:
+            return "tac_period_mismatch", {**slots, "missing": period["missing"]}
+        cur = week_of(today)
+        week = (period or {}).get("week")
+        season = (period or {}).get("season")
+        # 전체기간 어획량은 어기 단위 — 주차를 주면 그 주가 속한 어기로
+        if detail == "season_total" and week is not None:
+            week, season = None, week.season
+        # 현재 주차/어기를 명시한 경우는 현재 값 조회와 같음
+        if week == cur:
+            week = None
+        if season == cur.season:
+            season = None
+        # 주차 단위 응답에 지난 어기, 예측에 지난 주차 → 보여줄 값이 없으므로 안내
+        if (season is not None and detail != "season_total") or (week is not None and detail == "forecast"):
+            return "tac_period_mismatch", slots
+        if week is not None:
+            slots["week"] = week
+        if season is not None:
+            slots["season"] = season
+        return "tac_detail", slots
+
+    # ② <어종> <업종> → 선적지 목록
+    duo = parse_tac_dual(t)
+    if duo:
+        return "tac_ports", {"species": duo[0], "industry": duo[1]}
+
+    # ③ TAC <어종> → 업종 목록
+    tac_target = is_tac_list_request(t)
+    if tac_target:
+        sp = resolve_tac_key(tac_target)
+        if sp:
+            return "tac_industries", {"species": sp}
+        return "tac_unknown", {"target": tac_target}
+
+    # ④ 특정 어종 상세 (fish_data에 없으면 "없음" 안내로 떨어짐)
+    #    "제주 소라 금어기", "갈치 근해채낚기 금어기"처럼 지역/업종이 있으면 해당 규제만
+    region, industry = extract_scope(t, extra_regions=all_ports_union(), extra_industries=all_industries_union())
+    rest = " ".join(x for x in t.split() if x not in (region, industry))
+
+    #    여러 어종을 한 번에 ("갈치 고등어 참조기 금어기", "꽃게 대게 금지체장") → 합친 응답 하나
+    sids = extract_species(rest)
+    if len(sids) >= 2:
+        slots = {"fishes": [SPECIES[s].key for s in sids], "rule_type": extract_rule_type(t)}
+        if region or industry:
+            slots.update(region=region, industry=industry)
+        return "fish_multi", slots
+
+    fish_norm = normalize_fish_name(rest)
+    if not fish_norm:
+        # "울산", "광주 금어기"처럼 지역/업종만 있으면 원래 발화를 어종명으로 (빈 머리글 방지)
+        region = industry = None
+        fish_norm = normalize_fish_name(t) or t
+    slots = {"fish": fish_norm}
+    if region or industry:
+        slots.update(region=region, industry=industry, rule_type=extract_rule_type(t))
+    sp = get_species(fish_norm)
+    if sp and sp.record:
+        return "fish_info", slots
+    return "fish_unknown", slots
+
+def ensure_forecast(today):
+    """데이터 버전이나 주차가 바뀌었으면 예측을 다시 계산"""
+    if FORECAST_META["data_version"] != data_version() or FORECAST_META["week"] != week_of(today):
+        run_forecast(today)
+
+def render_tac_detail(fish_norm, industry, port, detail, today, week=None, season=None):
+    if detail == "forecast":
+        ensure_forecast(today)
+        return render_depletion_forecast(
+            fish_norm, industry, port, get_forecast(fish_norm, industry, port),
+            ref_date=today, industry_fc=get_industry_forecast(fish_norm, industry),
+        )
+    if detail == "depletion":
+        rows = get_depletion_rows(fish_norm, industry, port, week=week)
+        return render_depletion_summary(fish_norm, industry, port, rows, ref_date=today, week=week)
+    if detail == "weekly_ts":
+        rows = get_weekly_vessel_catch(fish_norm, industry, port, week=week)
+        return render_weekly_vessel_catch(fish_norm, industry, port, rows, ref_date=today, week=week)
+    if detail == "season_total":
+        rows = get_season_vessel_catch(fish_norm, industry, port, season=season)
+        return render_season_vessel_catch(fish_norm, industry, port, rows, ref_date=today, season=season)
+    # 기본: 주간보고
+    data = get_weekly_report(fish_norm, industry, port, week=week)
+    return render_weekly_report(fish_norm, industry, port, data, ref_date=today, week=week)
+
+# 차트가 붙는 상세 유형 (주간보고/소진현황)
+CHART_DETAILS = ("weekly_report", "depletion")
+
+def depletion_chart_for(fish_norm, industry, port, today, week=None):
+    """소진현황 차트 URL — 아직 없으면 백그라운드 렌더링만 걸고 None (텍스트만 응답)"""
+    cur = week_of(today)
+    target = week or cur
+    rows = get_depletion_rows(fish_norm, industry, port, week=week)
+    if not rows:
+        return None
+    trend = [(f"{w.month}/{w.week}", v) for w, v in depletion_trend(fish_norm, industry, port, target, current=cur)]
+    title = f"{display_name(fish_norm)} {industry} {port} 소진율 ({target.month}월 {target.week}주차)"
+    return depletion_chart_url((fish_norm, industry, port, target.key), data_version(), title, rows, trend)
+
+def fmt_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{int(seconds)}초 전 "
+    if seconds < 3600:
+        return f"{int(seconds // 60)}분 전 "
+    return f"{int(seconds // 3600)}시간 전 "
+
+def stale_note() -> str:
+    """데이터 호출이 지연/실패해 마지막 정상 값으로 대체됐으면 안내 문구"""
+    age = stale_age()
+    if age is None:
+        return ""
+    if age == float("inf"):
+        return "\n\n⏱ 데이터 서버 응답이 늦어 최신 값을 불러오지 못했습니다. 잠시 후 다시 시도해 주세요."
+    return f"\n\n⏱ 데이터 서버 응답이 늦어 {fmt_age(age)}기준 값으로 안내합니다."
+
+def answer_routed(intent: str, slots: dict, today):
+    if intent == "help":
+        return build_response(HELP_TEXT, buttons=BASE_MENU)
+
+    # 오늘 금어기 (버튼 유지)
+    if intent == "today_ban":
+        region = slots.get("region")
+        if region:
+            fishes = banned_fishes_in_region_cached(today.month, today.day, region)
+        else:
+            fishes = today_banned_fishes_cached(today.month, today.day)
+        where = f" {region}" if region else ""
+        if not fishes:
+            return build_response(f"📅 오늘({today.month}월 {today.day}일){where} 금어기 어종은 없습니다.", buttons=BASE_MENU)
+        lines = [f"📅 오늘({today.month}월 {today.day}일){where} 금어기 어종:"]
+        lines += [f"- {get_emoji(n)} {display_name(n)}" for n in fishes]
+        buttons = [{"label": display_name(n), "action":"message", "messageText": display_name(n)} for n in fishes[:MAX_QR]]
+        return build_response("\n".join(lines), buttons=buttons)
+
+    # 월 금어기 (버튼 유지)
+    if intent == "month_ban":
+        m = slots["month"]
+        result = []
+        for sid, (sm, _), (em, _2) in _PARSED_PERIODS:
+            if sm <= em:
+                if sm <= m <= em: result.append(sid)
+            else:
+                if m >= sm or m <= em: result.append(sid)
+        if not result:
+            return build_response(f"📅 {m}월 금어기 어종은 없습니다.", buttons=BASE_MENU)
+        lines = [f"📅 {m}월 금어기 어종:"]
+        lines += [f"- {get_emoji(n)} {display_name(n)}" for n in result]
+        buttons = [{"label": display_name(n), "action":"message", "messageText": display_name(n)} for n in result[:MAX_QR]]
+        return build_response("\n".join(lines), buttons=buttons)
+
+    if intent == "tac_detail":
+        fish_norm, industry, port = slots["species"], slots["industry"], slots["port"]
+        text = render_tac_detail(
+            fish_norm, industry, port, slots["detail"], today,
+            week=slots.get("week"), season=slots.get("season"),
+        ) + stale_note()
+        image_url = None
+        if slots["detail"] in CHART_DETAILS:
+            image_url = depletion_chart_for(fish_norm, industry, port, today, week=slots.get("week"))
+        return build_response(
+            text, buttons=build_port_detail_buttons(fish_norm, industry, port),
+            image_url=image_url, image_alt=f"{port} 선박별 소진율",
+        )
+
+    if intent == "tac_period_mismatch":
+        fish_norm, industry, port = slots["species"], slots["industry"], slots["port"]
+        head = f"⚠️ {slots['missing']}는 없는 주차입니다." if slots.get("missing") else \
+            "⚠️ 요청하신 기간으로는 조회할 수 없는 항목입니다."
+        text = (
+            head + "\n"
+            "• 주간보고/소진현황/주간별 어획량: '7월 2주차 …'처럼 주차로\n"
+            "• 전체기간 어획량: '24~25년 어기 …'처럼 어기로\n"
+            "• 소진 예측: 현재 주차만"
+        )
+        return build_response(text, buttons=build_port_detail_buttons(fish_norm, industry, port))
+
+    if intent == "tac_ports":
+        fish_norm, industry = slots["species"], slots["industry"]
+        ports = get_ports(fish_norm, industry)
+        lines = [f"⛱️ {display_name(fish_norm)} {industry} 선적지 ⛱️", ""]
+        lines += ports + ["", "아래 버튼을 눌러주세요."]
+        return build_response("\n".join(lines), buttons=build_port_buttons(fish_norm, industry))
+
+    if intent == "tac_industries":
+        sp = slots["species"]
+        inds = get_industries(sp)
+        lines = [f"🚢 {display_name(sp)} TAC 업종 🚢", ""]
+        lines += inds + ["", "자세한 내용은 버튼을 눌러주십시오."]
+        return build_response("\n".join(lines), buttons=build_tac_industry_buttons(sp))
+
+    if intent == "tac_unknown":
+        return build_response(f"'{display_name(slots['target'])}' TAC 업종 정보가 없습니다.", buttons=BASE_MENU)
+
+    if intent == "fish_multi":
+        fishes = slots["fishes"]
+        text = get_multi_fish_info(
+            fishes, region=slots.get("region"), industry=slots.get("industry"), rule_type=slots.get("rule_type"),
+        )
+        return build_response(text, buttons=build_fish_buttons(fishes))
+
+    # 특정 어종 상세: 금어기/금지체장 등 정보 텍스트 생성
+    fish_norm = slots["fish"]
+    text, _btns_ignored = get_fish_info(
+        fish_norm, region=slots.get("region"), industry=slots.get("industry"), rule_type=slots.get("rule_type"),
+    )
+
+    # 버튼 구성: TAC 대상이면 TAC 버튼, 아니면 기본 메뉴
+    tac_btns = build_tac_entry_button_for(fish_norm)
+    return build_response(text, buttons=tac_btns or BASE_MENU)
+
+ERROR_TEXT = "⚠️ 오류가 발생했습니다. 잠시 후 다시 시도해 주세요."
+
+def answer(user_text: str, today=None):
+    """발화 하나에 대한 카카오 응답(dict) 생성 — 요청 컨텍스트와 무관"""
     try:
-        req = request.get_json(force=True, silent=True) or {}
-        user_text = (req.get("userRequest", {}).get("utterance") or "").strip()
-        today = datetime.now(KST)
+        today = today or datetime.now(KST)
+        intent, slots = route(user_text, today)
+        return answer_routed(intent, slots, today)
+    except Exception as e:
+        logger.error(f"[ERROR] fishbot error: {e}", exc_info=True)
+        return build_response(ERROR_TEXT, buttons=BASE_MENU)
 
-        # 도움말
-        if "도움말" in user_text:
-            return jsonify(build_response(HELP_TEXT, buttons=BASE_MENU))
+# ──────────────────────────────────────────────────────────────────────────────
+# 응답 캐시 — (정규화 발화, 날짜, 데이터 버전) → 응답
+# ──────────────────────────────────────────────────────────────────────────────
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 4096))
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def _cache_key(user_text: str, today):
+    return (_CLEAN_RE.sub(" ", (user_text or "").strip()), today.date(), data_version())
+
+def cached_answer(user_text: str, today=None):
+    today = today or datetime.now(KST)
+    key = _cache_key(user_text, today)
+    with _response_cache_lock:
+        hit = _response_cache.get(key)
+        if hit is not None:
+            _response_cache.move_to_end(key)
+            return hit
+    resp, ok = answer_for_cache(user_text, today)
+    if ok:
+        with _response_cache_lock:
+            _response_cache[key] = resp
+            _response_cache.move_to_end(key)
+            while len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+    return resp
+
+def answer_for_cache(user_text: str, today):
+    """→ (응답, 캐시 가능 여부)"""
+    reset_staleness()
+    reset_chart_pending()
+    resp = answer(user_text, today=today)
+    # 오류 응답, 마지막 정상 값으로 대체된 응답, 차트 렌더링 대기 중인 텍스트 전용 응답은 캐시하지 않음
+    ok = resp["template"]["outputs"][0]["simpleText"]["text"] != ERROR_TEXT and stale_age() is None and not chart_pending()
+    return resp, ok
+
+def publish_responses(entries: dict):
+    """{캐시 키: 응답}을 한 번에 캐시에 넣음 (한 묶음이 동시에 보이도록 잠금 한 번)"""
+    with _response_cache_lock:
+        for key, resp in entries.items():
+            _response_cache[key] = resp
+            _response_cache.move_to_end(key)
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
 
-        # 오늘 금어기 (버튼 유지)
-        if is_today_ban_query(user_text):
-            fishes = today_banned_fishes_cached(today.month, today.day)
-            if not fishes:
-                return jsonify(build_response(f"📅 오늘({today.month}월 {today.day}일) 금어기 어종은 없습니다.", buttons=BASE_MENU))
-            lines = [f"📅 오늘({today.month}월 {today.day}일) 금어기 어종:"]
-            lines += [f"- {get_emoji(n)} {display_name(n)}" for n in fishes]
-            buttons = [{"label": display_name(n), "action":"message", "messageText": display_name(n)} for n in fishes[:MAX_QR]]
-            return jsonify(build_response("\n".join(lines), buttons=buttons))
-
-        # 월 금어기 (버튼 유지)
-        m = extract_month_query(user_text)
-        if m is not None:
-            result = []
-            for name, (sm, _), (em, _2) in _PARSED_PERIODS:
-                if sm <= em:
-                    if sm <= m <= em: result.append(name)
-                else:
-                    if m >= sm or m <= em: result.append(name)
-            if not result:
-                return jsonify(build_response(f"📅 {m}월 금어기 어종은 없습니다.", buttons=BASE_MENU))
-            lines = [f"📅 {m}월 금어기 어종:"]
-            lines += [f"- {get_emoji(n)} {display_name(n)}" for n in result]
-            buttons = [{"label": display_name(n), "action":"message", "messageText": display_name(n)} for n in result[:MAX_QR]]
-            return jsonify(build_response("\n".join(lines), buttons=buttons))
-
-        # ① <어종> <업종> <선적지> (+세부 의도)
-        trip = parse_tac_triplet(user_text)
-        if trip:
-            fish_norm, industry, port = trip
-            intent = parse_detail_intent(user_text)
-
-            if intent == "depletion":
-                rows = get_depletion_rows(fish_norm, industry, port)
-                text = render_depletion_summary(fish_norm, industry, port, rows, ref_date=today)
-                return jsonify(build_response(text, buttons=build_port_detail_buttons(fish_norm, industry, port)))
-
-            if intent == "weekly_ts":
-                rows = get_weekly_vessel_catch(fish_norm, industry, port)
-                text = render_weekly_vessel_catch(fish_norm, industry, port, rows, ref_date=today)
-                return jsonify(build_response(text, buttons=build_port_detail_buttons(fish_norm, industry, port)))
-
-            if intent == "season_total":
-                rows = get_season_vessel_catch(fish_norm, industry, port)
-                text = render_season_vessel_catch(fish_norm, industry, port, rows, ref_date=today)
-                return jsonify(build_response(text, buttons=build_port_detail_buttons(fish_norm, industry, port)))
-
-            # 기본: 주간보고
-            data = get_weekly_report(fish_norm, industry, port)
-            text = render_weekly_report(fish_norm, industry, port, data, ref_date=today)
-            return jsonify(build_response(text, buttons=build_port_detail_buttons(fish_norm, industry, port)))
-
-        # ② <어종> <업종> → 선적지 목록
-        duo = parse_tac_dual(user_text)
-        if duo:
-            fish_norm, industry = duo
-            ports = get_ports(fish_norm, industry)
-            lines = [f"⛱️ {display_name(fish_norm)} {industry} 선적지 ⛱️", ""]
-            lines += ports + ["", "아래 버튼을 눌러주세요."]
-            return jsonify(build_response("\n".join(lines), buttons=build_port_buttons(fish_norm, industry)))
-
-        # ③ TAC <어종> → 업종 목록
-        tac_target = is_tac_list_request(user_text)
-        if tac_target:
-            sp = resolve_tac_key(tac_target)
-            if sp:
-                inds = get_industries(sp)
-                lines = [f"🚢 {display_name(sp)} TAC 업종 🚢", ""]
-                lines += inds + ["", "자세한 내용은 버튼을 눌러주십시오."]
-                return jsonify(
-                    build_response(
-                        "\n".join(lines),
-                        buttons=build_tac_industry_buttons(sp)
-                    )
-                )
-            else:
-                return jsonify(
-                    build_response(
-                        f"'{display_name(tac_target)}' TAC 업종 정보가 없습니다.",
-                        buttons=BASE_MENU
-                    )
-                )
+# ──────────────────────────────────────────────────────────────────────────────
+# 대화 그래프 크롤러 — quickReplies의 messageText를 따라 BFS로 응답 캐시 워밍
+# ──────────────────────────────────────────────────────────────────────────────
+WARM_TOP_UTTERANCES = int(os.environ.get("WARM_TOP_UTTERANCES", 200))
+
+def crawl_seeds():
+    # 실제로 자주 들어오는 발화(저장된 빈도 집계 상위)를 먼저 데움
+    seeds = top_utterances(WARM_TOP_UTTERANCES)
+    seeds += [b["messageText"] for b in BASE_MENU]
+    seeds += [sp.display for sp in SPECIES if sp.record]
+    seeds += [f"TAC {sp.display}" for sp in SPECIES if sp.tac]
+    return list(dict.fromkeys(seeds))
+
+def warm_response_cache(today=None, max_nodes=None):
+    """도달 가능한 모든 메뉴 응답을 미리 렌더링하고 막다른 버튼/파싱 실패를 보고"""
+    today = today or datetime.now(KST)
+    max_nodes = max_nodes or RESPONSE_CACHE_SIZE
+    t0 = time.perf_counter()
+    seen, queue = set(), deque()
+    dead_ends, unparsed = [], []
+
+    for text in crawl_seeds():
+        if text not in seen:
+            seen.add(text); queue.append((text, None))
+
+    while queue and len(seen) <= max_nodes:
+        text, parent = queue.popleft()
+        intent, _slots = route(text, today)
+        if intent in ("fish_unknown", "tac_unknown"):
+            unparsed.append({"utterance": text, "from": parent})
+        resp = cached_answer(text, today=today)
+        buttons = resp["template"].get("quickReplies") or []
+        if not buttons:
+            dead_ends.append({"utterance": text, "from": parent})
+        for b in buttons:
+            nxt = b.get("messageText")
+            if nxt and nxt not in seen:
+                seen.add(nxt); queue.append((nxt, text))
+
+    report = {
+        "nodes": len(seen),
+        "dead_ends": dead_ends,
+        "unparsed": unparsed,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+        "data_version": data_version(),
+    }
+    logger.info(
+        f"[WARM] 응답 캐시 워밍 완료: {report['nodes']}건, 막다른 버튼 {len(dead_ends)}건, "
+        f"파싱 실패 {len(unparsed)}건 ({report['elapsed_ms']}ms)"
+    )
+    for d in unparsed:
+        logger.warning(f"[WARM] 파싱 실패: '{d['utterance']}' (← '{d['from'] or '시드'}')")
+    return report
 
-        # ④ 특정 어종 상세
-        fish_norm = normalize_fish_name(user_text)
+# ──────────────────────────────────────────────────────────────────────────────
+# 주간보고/소진현황 사전 계산 — 날짜가 바뀌기 직전(토요일이면 주차도 바뀜)과 데이터 버전이 바뀔 때
+#   모든 (어종, 업종, 선적지)의 주간보고/소진현황/어획량 응답을 백그라운드 풀에서 만들어 한 번에 캐시에 게시
+#   → 자정 직후·새 데이터 반영 직후 첫 요청도 캐시 적중
+# 응답 캐시 키에 날짜가 들어가므로 매일 자정이 캐시 경계입니다.
+# 새 주차/데이터 버전이면 차트 파일명이 바뀌어 첫 계산에선 차트가 아직 없음 → 렌더링을 기다렸다가 다시 만들고,
+# PRECOMPUTE_CHART_WAIT_SEC 안에 못 끝나면 텍스트 응답을 그대로 게시 (사전 계산 대상에서 빠지지 않도록)
+# ──────────────────────────────────────────────────────────────────────────────
+PRECOMPUTE_LEAD_SEC = float(os.environ.get("PRECOMPUTE_LEAD_SEC", 120))
+PRECOMPUTE_WORKERS = int(os.environ.get("PRECOMPUTE_WORKERS", 4))
+PRECOMPUTE_CHART_WAIT_SEC = float(os.environ.get("PRECOMPUTE_CHART_WAIT_SEC", 30))
+PRECOMPUTE_STATS = {"runs": 0, "last_reason": None, "last_target": None, "last_published": 0,
+                    "last_skipped": 0, "last_chart_waited": 0, "last_text_only": 0, "last_ms": None}
+_precompute_wake = threading.Event()
+
+def report_utterances(include_forecast: bool = True):
+    """선적지별 상세 버튼이 보내는 발화 전체 (주간보고 = "<어종> <업종> <선적지>")"""
+    out = []
+    for sp in SPECIES:
+        if not sp.tac:
+            continue
+        for industry in get_industries(sp.tac_key):
+            for port in get_ports(sp.tac_key, industry):
+                out.append(f"{sp.display} {industry} {port}")
+                for b in build_port_detail_buttons(sp.tac_key, industry, port):
+                    text = b["messageText"]
+                    if parse_detail_intent(text) and (include_forecast or parse_detail_intent(text) != "forecast"):
+                        out.append(text)
+    return list(dict.fromkeys(out))
+
+def precompute_reports(target, reason: str):
+    """target 날짜 기준 응답을 모두 만든 뒤 한 번에 게시 → 게시 건수"""
+    t0 = time.perf_counter()
+    # 다음 주 응답을 미리 만들 때 예측까지 만들면 현재 주 예측과 번갈아 재계산되므로 같은 주일 때만 포함
+    include_forecast = week_of(target) == week_of(datetime.now(KST))
+    texts = report_utterances(include_forecast)
+    keys = [_cache_key(t, target) for t in texts]   # 계산 시작 시점의 데이터 버전으로 키 고정
+
+    def one(t):
+        resp, ok = answer_for_cache(t, target)
+        # 차트만 준비 중인 응답인지 — 같은 스레드에서 읽어야 함 (contextvar)
+        chart_only = not ok and chart_pending() and stale_age() is None and \
+            resp["template"]["outputs"][0]["simpleText"]["text"] != ERROR_TEXT
+        return resp, ok, chart_only
+
+    with ThreadPoolExecutor(max_workers=PRECOMPUTE_WORKERS, thread_name_prefix="tac-precompute") as pool:
+        results = list(pool.map(one, texts))
+        waiting = [i for i, (_r, _ok, chart_only) in enumerate(results) if chart_only]
+        if waiting:
+            wait_pending(PRECOMPUTE_CHART_WAIT_SEC)
+            for i, r in zip(waiting, pool.map(one, [texts[i] for i in waiting])):
+                results[i] = r
+    text_only = 0
+    entries = {}
+    for k, (resp, ok, chart_only) in zip(keys, results):
+        if ok or chart_only:
+            entries[k] = resp   # 기다려도 차트가 없으면 텍스트 응답이라도 게시
+            text_only += chart_only
+    if keys and keys[0][2] != data_version():
+        entries = {}   # 도중에 데이터가 바뀜 — 새 버전으로 다시 계산되므로 게시하지 않음
+    publish_responses(entries)
+    elapsed_ms = round((time.perf_counter() - t0) * 1000, 1)
+    PRECOMPUTE_STATS.update(
+        runs=PRECOMPUTE_STATS["runs"] + 1, last_reason=reason, last_target=target.isoformat(),
+        last_published=len(entries), last_skipped=len(texts) - len(entries),
+        last_chart_waited=len(waiting), last_text_only=text_only, last_ms=elapsed_ms,
+    )
+    logger.info(f"[PRECOMPUTE] {reason}: {target:%Y-%m-%d %H:%M} 기준 {len(entries)}/{len(texts)}건 게시 ({elapsed_ms}ms)")
+    return len(entries)
+
+def _next_midnight(now):
+    return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _precompute_loop(warm_first: bool):
+    if warm_first:
+        now = datetime.now(KST)
+        precompute_reports(now, "시작")
+        warm_response_cache(now)
+    done_for = None
+    while True:
+        now = datetime.now(KST)
+        midnight = _next_midnight(now)
+        if done_for == midnight:
+            midnight = _next_midnight(midnight)
+        woke = _precompute_wake.wait(max(0.0, (midnight - now).total_seconds() - PRECOMPUTE_LEAD_SEC))
+        try:
+            if woke:
+                _precompute_wake.clear()
+                now = datetime.now(KST)
+                precompute_reports(now, f"데이터 버전 {data_version()}")
+                warm_response_cache(now)
+            else:
+                precompute_reports(midnight, "주차 전환" if midnight.weekday() == 5 else "날짜 전환")
+                done_for = midnight
+                # 자정에 주차가 바뀌면 현재 표를 지난 주차로 보관 (주차가 같으면 아무 일 없음)
+                timer = threading.Timer(max(0.0, (midnight - datetime.now(KST)).total_seconds()), roll_week, args=(midnight,))
+                timer.daemon = True
+                timer.start()
+        except Exception as e:
+            logger.error(f"[PRECOMPUTE] 실패: {e}", exc_info=True)
+
+def start_precompute(warm_first: bool = True):
+    threading.Thread(target=_precompute_loop, args=(warm_first,), name="tac-precompute", daemon=True).start()
 
-        # 금어기/금지체장 등 정보 텍스트 생성
-        text, _btns_ignored = get_fish_info(fish_norm)
+# ──────────────────────────────────────────────────────────────────────────────
+# 대화 맥락 — 짧은 후속 발화("소진현황", "울산", "근해자망")를 직전 어종/업종/선적지로 보완
+# ──────────────────────────────────────────────────────────────────────────────
+_CONTEXT_INTENTS = ("tac_detail", "tac_ports", "tac_industries")
+
+def resolve_with_context(user_text: str, ctx, today):
+    """단독으로 해석되지 않는 발화에 맥락을 앞에 붙여 재해석 → (발화, 의도, 슬롯)"""
+    t = (user_text or "").strip()
+    intent, slots = route(t, today)
+    if intent not in ("fish_unknown", "tac_unknown") or not ctx:
+        return t, intent, slots
+
+    species, industry, port = ctx[0], ctx[1], ctx[2]
+    disp = display_name(species)
+    prefixes = []
+    if industry and port:
+        prefixes.append(f"{disp} {industry} {port}")
+    if industry:
+        prefixes.append(f"{disp} {industry}")
+    prefixes.append(disp)
+
+    for prefix in prefixes:
+        candidate = f"{prefix} {t}"
+        c_intent, c_slots = route(candidate, today)
+        if c_intent in _CONTEXT_INTENTS:
+            session_store.STATS["resolved_by_context"] += 1
+            return candidate, c_intent, c_slots
+    return t, intent, slots
+
+def resolve_for_user(user_text: str, user_id: str = "", today=None):
+    """맥락 보완 + 세션 갱신 → (해석된 발화, 의도, 슬롯)"""
+    today = today or datetime.now(KST)
+    session_store.STATS["requests"] += 1
+    try:
+        ctx = get_context(user_id) if user_id else None
+        text, intent, slots = resolve_with_context(user_text, ctx, today)
+        if user_id and intent in _CONTEXT_INTENTS:
+            set_context(user_id, slots["species"], slots.get("industry"), slots.get("port"))
+        if intent == "tac_detail":
+            session_store.STATS["lookups"] += 1
+        return text, intent, slots
+    except Exception as e:
+        logger.warning(f"[WARN] 대화 맥락 처리 실패: {e}")
+        return user_text, None, None
+
+def answer_for_user(user_text: str, user_id: str = "", today=None, use_cache=True):
+    """→ (응답, 의도, 슬롯)"""
+    today = today or datetime.now(KST)
+    text, intent, slots = resolve_for_user(user_text, user_id, today)
+    resp = cached_answer(text, today=today) if use_cache else answer(text, today=today)
+    return resp, intent, slots
+
+def _user_request_of(payload) -> dict:
+    """카카오 페이로드의 userRequest — 형식이 맞지 않으면 ValueError"""
+    ur = (payload.get("userRequest") or {}) if isinstance(payload, dict) else None
+    if not isinstance(ur, dict):
+        raise ValueError("userRequest 형식이 올바르지 않습니다.")
+    return ur
+
+def user_id_of(payload) -> str:
+    """사용자 ID (없거나 형식이 이상하면 빈 문자열 — 사용자별 제한 없이 전역 제한만)"""
+    try:
+        user = _user_request_of(payload).get("user")
+    except ValueError:
+        return ""
+    uid = user.get("id") if isinstance(user, dict) else None
+    return str(uid) if uid is not None else ""
+
+def utterance_of(payload) -> str:
+    """카카오 페이로드 또는 평문 발화에서 utterance 추출 (문자열이 아니면 str로, 페이로드 형식 오류는 ValueError)"""
+    if isinstance(payload, str):
+        return payload
+    utterance = _user_request_of(payload).get("utterance")
+    return str(utterance) if utterance is not None else ""
+
+# 제한에 걸린 요청용 응답 — 한 번만 인코딩해 두고 그대로 돌려줌 (카카오는 200 응답만 말풍선으로 표시)
+BUSY_TEXT = "⏳ 요청이 많아 잠시 후 다시 시도해 주세요."
+_BUSY_BODY = json.dumps(build_response(BUSY_TEXT, buttons=BASE_MENU), ensure_ascii=False).encode("utf-8")
+
+def busy_response():
+    return Response(_BUSY_BODY, mimetype="application/json")
 
-        # TAC 버튼 생성
-        tac_btns = build_tac_entry_button_for(fish_norm)
+@app.route("/TAC", methods=["POST"])
+def fishbot():
+    req = request.get_json(force=True, silent=True) or {}
+    user_id = user_id_of(req)
 
-        # 버튼 구성: TAC 대상이면 TAC 버튼, 아니면 기본 메뉴
-        if tac_btns:
-            return jsonify(build_response(text, buttons=tac_btns))
+    if not allow_user(user_id) or not try_admit():
+        return busy_response()
+    token = begin_request(request_deadline_from_now())
+    try:
+        user_text = utterance_of(req)   # 페이로드 형식 오류도 아래 오류 말풍선으로
+        if should_profile(request.headers.get("X-Profile") == "1" and is_admin(request)):
+            # 프로파일 요청은 캐시를 거치지 않고 실제 렌더링 경로를 측정
+            (resp, intent, slots), prof, elapsed_ms = run_profiled(answer_for_user, user_text, user_id, use_cache=False)
+            save_profile(prof, intent, slots, elapsed_ms)
         else:
-            return jsonify(build_response(text, buttons=BASE_MENU))
+            resp, intent, _slots = answer_for_user(user_text, user_id)
+        utterance_stats.record(_CLEAN_RE.sub(" ", user_text.strip()), intent)
+        return jsonify(resp)
+    except Exception as e:
+        logger.error(f"[ERROR] fishbot error: {e}", exc_info=True)
+        return jsonify(build_response(ERROR_TEXT, buttons=BASE_MENU))
+    finally:
+        end_request(token)
+        release()
 
-        # 폴백
-        return jsonify(
-            build_response("제가 할 수 있는 일이 아니에요.", buttons=BASE_MENU)
-        )
+# ──────────────────────────────────────────────────────────────────────────────
+# 배치 평가 (/TAC/batch) — QA·백필·캐시 워밍용
+#   요청: {"items": [<카카오 페이로드> | "<발화>", ...], "warm": false}
+#   응답: NDJSON, 입력 순서대로 한 줄씩 {"index","utterance","elapsed_ms","response"} (실패한 항목은 {"index","error"})
+#   인증: X-Batch-Token == BATCH_TOKEN (또는 관리자 토큰)
+#   기본은 응답 캐시를 건드리지 않음(QA 배치가 공용 캐시·사전 계산 응답을 밀어내지 않도록) — "warm": true일 때만 캐시에 씀
+#   배치 요청 하나가 /TAC 입장 제어 슬롯 하나를 끝날 때까지 점유
+# ──────────────────────────────────────────────────────────────────────────────
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 2000))
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 4))
+BATCH_TOKEN = os.environ.get("BATCH_TOKEN", "")
+_batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="tac-batch")
 
+def can_batch(req) -> bool:
+    return is_admin(req) or (bool(BATCH_TOKEN) and req.headers.get("X-Batch-Token") == BATCH_TOKEN)
+
+def _timed_answer(index: int, payload, today, warm: bool = False):
+    """항목 하나 처리 — 실패해도 예외를 올리지 않고 {"index","error"} 줄로 (스트림이 중간에 끊기지 않도록)"""
+    try:
+        user_text = utterance_of(payload)
+        t0 = time.perf_counter()
+        resp = cached_answer(user_text, today=today) if warm else answer(user_text, today=today)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        return {"index": index, "utterance": user_text, "elapsed_ms": round(elapsed_ms, 3), "response": resp}
     except Exception as e:
-        logger.error(f"[ERROR] fishbot error: {e}", exc_info=True)
-        return jsonify(
-            build_response("⚠️ 오류가 발생했습니다. 잠시 후 다시 시도해 주세요.", buttons=BASE_MENU)
-        )
+        logger.error(f"[BATCH] {index}번 항목 실패: {e}", exc_info=True)
+        return {"index": index, "error": str(e) or type(e).__name__}
+
+def iter_batch_results(items, today=None, window=None, warm: bool = False):
+    """items를 스레드 풀에서 처리하고 입력 순서대로 결과를 내보냄 (진행 중 작업 수는 window로 제한)"""
+    today = today or datetime.now(KST)
+    window = window or BATCH_WORKERS * 4
+    pending = deque()
+    for i, payload in enumerate(items):
+        pending.append(_batch_pool.submit(_timed_answer, i, payload, today, warm))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+@app.route("/TAC/batch", methods=["POST"])
+def fishbot_batch():
+    if not can_batch(request):
+        return jsonify({"error": "forbidden"}), 403
+    req = request.get_json(force=True, silent=True) or {}
+    items = req.get("items") if isinstance(req, dict) else req
+    warm = isinstance(req, dict) and req.get("warm") is True
+    if not isinstance(items, list):
+        return jsonify({"error": "items 배열이 필요합니다."}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"최대 {BATCH_MAX_ITEMS}건까지 처리할 수 있습니다."}), 413
+    if not try_admit():
+        return jsonify({"error": "요청이 많습니다. 잠시 후 다시 시도해 주세요."}), 503
+
+    def generate():
+        for row in iter_batch_results(items, warm=warm):
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    resp = Response(generate(), mimetype="application/x-ndjson")
+    resp.call_on_close(release)   # 스트림이 끝나거나 연결이 끊기면 슬롯 반납
+    return resp
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 관리자 라우트
+# ──────────────────────────────────────────────────────────────────────────────
+@app.route("/admin/alerts", methods=["GET"])
+def admin_alerts():
+    if not is_admin(request):
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(alert_stats())
+
+@app.route("/admin/sessions", methods=["GET"])
+def admin_sessions():
+    if not is_admin(request):
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(session_stats())
+
+@app.route("/admin/datasources", methods=["GET"])
+def admin_datasources():
+    if not is_admin(request):
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(resilience_stats())
+
+@app.route("/admin/utterances", methods=["GET"])
+def admin_utterances():
+    if not is_admin(request):
+        return jsonify({"error": "forbidden"}), 403
+    return app.response_class(
+        json.dumps(utterance_stats.utterance_stats(request.args.get("n", 50, type=int)), ensure_ascii=False),
+        mimetype="application/json",
+    )
+
+@app.route("/admin/precompute", methods=["GET"])
+def admin_precompute():
+    if not is_admin(request):
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(PRECOMPUTE_STATS)
+
+@app.route("/admin/limits", methods=["GET"])
+def admin_limits():
+    if not is_admin(request):
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(limiter_stats())
+
+@app.route("/admin/charts", methods=["GET"])
+def admin_charts():
+    if not is_admin(request):
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(chart_stats())
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 차트 이미지 — 파일명에 데이터 버전이 들어가 내용이 바뀌지 않으므로 장기 캐시
+# ──────────────────────────────────────────────────────────────────────────────
+CHART_MAX_AGE = 365 * 24 * 3600
+
+@app.route(f"{CHART_ROUTE}/<path:filename>", methods=["GET"])
+def chart_image(filename):
+    resp = send_from_directory(CHART_DIR, filename, mimetype="image/png", max_age=CHART_MAX_AGE)
+    resp.headers["Cache-Control"] = f"public, max-age={CHART_MAX_AGE}, immutable"
+    return resp
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 내보내기 (/TAC/export) — 조합 사무실용 CSV/NDJSON 스트리밍
+#   GET ?table=season|weekly|depletion&format=csv|ndjson&species=&industry=&port=&week=2025-07-2&season=2024
+#   인증: X-Export-Token == EXPORT_TOKEN (또는 관리자 토큰)
+# ──────────────────────────────────────────────────────────────────────────────
+EXPORT_TOKEN = os.environ.get("EXPORT_TOKEN", "")
+
+def can_export(req) -> bool:
+    return is_admin(req) or (bool(EXPORT_TOKEN) and req.headers.get("X-Export-Token") == EXPORT_TOKEN)
+
+def _parse_week_param(v: str):
+    m = re.match(r"^(\d{4})-(\d{1,2})-(\d)$", v or "")
+    return find_week(int(m.group(1)), int(m.group(2)), int(m.group(3))) if m else None
+
+@app.route("/TAC/export", methods=["GET"])
+def tac_export():
+    if not can_export(request):
+        return jsonify({"error": "forbidden"}), 403
+
+    args = request.args
+    table = args.get("table", "season")
+    fmt = args.get("format", "csv")
+    if table not in EXPORT_FIELDS or fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "table은 season/weekly/depletion, format은 csv/ndjson 중 하나여야 합니다."}), 400
+
+    species = args.get("species")
+    if species:
+        species = resolve_tac_key(normalize_fish_name(species)) or species
+    filters = {"species": species, "industry": args.get("industry"), "port": args.get("port")}
+
+    cur = week_of(datetime.now(KST))
+    period = None
+    if table == "season":
+        if args.get("season"):
+            m = re.match(r"^(\d{2}|\d{4})(?:~(?:\d{2}|\d{4}))?$", args["season"])
+            if not m:
+                return jsonify({"error": "season은 YYYY 또는 YY 형식이어야 합니다 (예: 2024, 24~25)."}), 400
+            period = int(m.group(1))
+            period = period if period >= 100 else 2000 + period
+        current_label = f"{cur.season}~{cur.season + 1}"
+    else:
+        if args.get("week"):
+            w = _parse_week_param(args["week"])
+            if w is None:
+                return jsonify({"error": "week는 YYYY-MM-N 형식이어야 합니다."}), 400
+            period = w.key
+        current_label = f"{cur.year}-{cur.month:02d}-{cur.week}"
+    # 현재 주차/어기를 지정하면 현재 표만, 지난 기간이면 과거 표에서 그 기간만
+    if period in (cur.key, cur.season):
+        filters["include_history"] = False
+    elif period is not None:
+        filters["period"] = period
+
+    mimetype = "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson"
+    filename = f"tac_{table}_{datetime.now(KST).strftime('%Y%m%d')}.{'csv' if fmt == 'csv' else 'ndjson'}"
+    return Response(
+        export_rows(table, fmt, current_label=current_label, **filters),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 소진현황 실시간 피드 (/TAC/live) — Server-Sent Events
+#   GET ?species=살오징어&industry=근해채낚기&port=부산
+#   첫 이벤트 "snapshot"(전체 행), 이후 적재 때마다 "diff"({"changed": [...], "removed": [선명...]})
+#   인증: X-Live-Token 헤더 또는 ?token= (브라우저 EventSource는 헤더를 못 붙임) == LIVE_TOKEN (또는 관리자 토큰)
+# ──────────────────────────────────────────────────────────────────────────────
+LIVE_TOKEN = os.environ.get("LIVE_TOKEN", "")
+
+def can_subscribe(req) -> bool:
+    token = req.headers.get("X-Live-Token") or req.args.get("token")
+    return is_admin(req) or (bool(LIVE_TOKEN) and token == LIVE_TOKEN)
+
+@app.route("/TAC/live", methods=["GET"])
+def tac_live():
+    if not can_subscribe(request):
+        return jsonify({"error": "forbidden"}), 403
+    args = request.args
+    species = resolve_tac_key(normalize_fish_name(args.get("species", "")))
+    industry, port = args.get("industry", ""), args.get("port", "")
+    if not species or port not in get_ports(species, industry):
+        return jsonify({"error": "species/industry/port를 확인해 주세요."}), 404
+
+    last_id = request.headers.get("Last-Event-ID", "")
+    body = subscribe(
+        (species, industry, port), get_depletion_rows(species, industry, port),
+        last_event_id=int(last_id) if last_id.isdigit() else None,
+    )
+    if body is None:
+        return jsonify({"error": "구독자가 많습니다. 잠시 후 다시 시도해 주세요."}), 503
+    return Response(body, mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",   # nginx 버퍼링 끄기
+    })
+
+@app.route("/admin/live", methods=["GET"])
+def admin_live():
+    if not is_admin(request):
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify(live_stats())
 
 # 헬스체크
 @app.route("/healthz", methods=["GET"])
 def healthz():
     return "ok", 200
 
+# ──────────────────────────────────────────────────────────────────────────────
+# 시작 — 백그라운드 스레드/사전 계산은 import가 아니라 여기서만 시작
+#   (차트 작업 프로세스는 spawn이라 이 스크립트를 __mp_main__으로 다시 import함 → import 시 부작용이 있으면
+#    작업 프로세스마다 사전 계산/워밍이 돌고 렌더링 풀까지 다시 만듦)
+#   python app.py → __main__에서 호출, gunicorn → gunicorn.conf.py의 post_worker_init에서 호출
+# ──────────────────────────────────────────────────────────────────────────────
+_init_lock = threading.Lock()
+_initialized = False
+
+def init_app():
+    """발화 통계/알림 상태 복원, 주차 전환·예측·사전 계산 시작 (프로세스당 한 번)"""
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        _initialized = True
+    utterance_stats.load()
+    utterance_stats.start_persisting()
+    load_alert_state()
+    seed_alert_state()   # 적재가 시작되기 전에 — 저장 상태에 없는 키는 지금 표의 값이 기준
+    on_data_update(lambda _v: run_forecast(datetime.now(KST)))
+    on_data_update(lambda _v: _precompute_wake.set())
+    roll_week(datetime.now(KST))
+    run_forecast(datetime.now(KST))
+    start_state_persisting()
+    start_delivery()
+    start_precompute(warm_first=os.environ.get("WARM_ON_START", "1") == "1")
+
 if __name__ == "__main__":
+    init_app()
     port = int(os.environ.get("PORT", 5000))
-    # 프로덕션 권장: gunicorn -w 4 -k gthread -b 0.0.0.0:$PORT app:app
+    # 프로덕션 권장: gunicorn -w 4 -k gthread --threads 16 -b 0.0.0.0:$PORT app:app
+    #   (같은 디렉터리의 gunicorn.conf.py가 자동으로 읽혀 워커마다 init_app() 호출)
+    #   (ADMISSION_MAX_INFLIGHT는 --threads보다 약간 작게 — 남는 스레드가 거절 응답/헬스체크를 처리)
+    #   (--threads를 바꾸면 WORKER_THREADS도 같게 — /TAC/live 구독자 기본 상한이 여기서 정해짐)
     app.run(host="0.0.0.0", port=port)
 
 
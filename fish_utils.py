@@ -1,59 +1,14 @@
 import re
 import logging
 from datetime import datetime
-from fish_data import fish_data
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from species_registry import (
+    SPECIES, SPECIES_BY_NAME, NAMES_LONGEST_FIRST, fish_name_aliases, get_species, species_id, guess_emoji,
+)
 
 logger = logging.getLogger(__name__)
 
-# 어종명 정규화 매핑
-fish_name_aliases = {
-    "문치가자미": "문치가자미",
-    "감성돔": "감성돔",
-    "돌돔": "돌돔",
-    "참돔": "참돔",
-    "넙치": "넙치(광어)",
-    "광어": "넙치(광어)",
-    "농어": "농어",
-    "대구": "대구",
-    "도루묵": "도루묵",
-    "민어": "민어",
-    "방어": "방어",
-    "볼락": "볼락",
-    "붕장어": "붕장어",
-    "조피볼락": "조피볼락(우럭)",
-    "우럭": "조피볼락(우럭)",
-    "쥐노래미": "쥐노래미",
-    "참홍어": "참홍어",
-    "갈치": "갈치",
-    "고등어": "고등어",
-    "참조기": "참조기",
-    "말쥐치": "말쥐치",
-    "갯장어": "갯장어",
-    "미거지": "미거지",
-    "청어": "청어",
-    "꽃게": "꽃게",
-    "대게": "대게",
-    "붉은대게": "붉은대게",
-    "소라": "제주소라",
-    "제주소라": "제주소라",
-    "오분자기": "오분자기",
-    "전복류": "전복(전복류)",
-    "전복": "전복(전복류)",
-    "키조개": "키조개",
-    "기수재첩": "기수재첩",
-    "넓미역": "넓미역",
-    "우뭇가사리": "우뭇가사리",
-    "톳": "톳",
-    "대문어": "대문어",
-    "살오징어": "살오징어",
-    "오징어": "살오징어",
-    "낙지": "낙지",
-    "주꾸미": "주꾸미",
-    "쭈꾸미": "주꾸미",
-    "쭈구미": "주꾸미",
-    "참문어": "참문어",
-    "해삼": "해삼",
-}
+# 어종 이름/별칭/이모지는 species_registry에서 관리 (fish_name_aliases는 하위 호환용 재노출)
 
 def clean_input(text: str) -> str:
     """사용자 입력에서 불필요 단어 제거"""
@@ -69,11 +24,23 @@ def clean_input(text: str) -> str:
 def normalize_fish_name(user_input: str) -> str:
     """사용자 입력을 정규화된 어종명으로 변환"""
     cleaned = clean_input(user_input)
-    for alias in sorted(fish_name_aliases.keys(), key=len, reverse=True):
-        if alias in cleaned:
-            return fish_name_aliases[alias]
+    for name in NAMES_LONGEST_FIRST:
+        if name in cleaned:
+            return SPECIES[SPECIES_BY_NAME[name]].key
     return cleaned
 
+# 발화 속 모든 어종을 한 번의 훑기로 찾음 — 같은 위치에서는 긴 이름 우선("붉은대게" ⊃ "대게"), 찾은 구간은 건너뜀
+_SPECIES_NAME_RE = re.compile("|".join(re.escape(n) for n in NAMES_LONGEST_FIRST))
+
+def extract_species(user_input: str) -> List[int]:
+    """발화에 나온 어종 ID들 (등장 순서, 중복 제거 — "넙치 광어"는 하나)"""
+    found: List[int] = []
+    for m in _SPECIES_NAME_RE.finditer((user_input or "").lower()):
+        sid = SPECIES_BY_NAME[m.group(0)]
+        if sid not in found:
+            found.append(sid)
+    return found
+
 def convert_period_format(period: str) -> str:
     """금어기 기간을 'MM월DD일 ~ MM월DD일' 형식으로 변환"""
     try:
@@ -94,23 +61,124 @@ def convert_period_format(period: str) -> str:
         logger.warning(f"[convert_period_format] {period} 변환 오류: {e}")
         return period
 
-def get_fish_info(fish_name: str):
-    """특정 어종의 금어기·금지체장 정보 반환"""
-    fish = fish_data.get(fish_name)
-    display_name = fish_name
+# ──────────────────────────────────────────────────────────────────────────────
+# 규제 색인 — fish_data의 복합 키를 로드 시 한 번만 해석
+#   "금어기"                              → 전국 금어기
+#   "제주_금어기", "울릉,독도_금어기"       → 지역별 금어기 (지역 여러 개 가능)
+#   "근해채낚기, 연안복합, 정치망_금어기"  → 업종별 금어기
+#   "금어기_예외", "금어기_해역_특이사항"  → 금어기 관련 비고
+# 금지체장/금지체중도 같은 규칙으로 해석합니다.
+# ──────────────────────────────────────────────────────────────────────────────
+RULE_TYPES = ("금어기", "금지체장", "금지체중")
+NATIONAL = "전국"
+
+REGIONS = {
+    "제주", "추자도", "울릉", "독도", "부산", "울산", "강원", "경북", "경남",
+    "전남", "전북", "충남", "충북", "인천", "경기", "서울", "대구", "광주", "대전", "세종",
+}
+GEAR_SUFFIXES = ("채낚기", "연안복합", "정치망", "유자망", "자망", "트롤", "선망", "저인망", "통발", "구획", "연안", "근해")
 
-    # 이모지 선택
-    emoji = "🐟"
-    if "전복" in fish_name or "소라" in fish_name:
-        emoji = "🐚"
-    elif "오징어" in fish_name:
-        emoji = "🦑"
-    elif any(x in fish_name for x in ["주꾸미", "문어", "낙지"]):
-        emoji = "🐙"
-    elif "게" in fish_name:
-        emoji = "🦀"
-    elif any(x in fish_name for x in ["미역", "우뭇가사리", "톳"]):
-        emoji = "🌿"
+class Rule(NamedTuple):
+    species: int            # 어종 ID (species_registry)
+    rule_type: str          # 금어기 / 금지체장 / 금지체중
+    scope_kind: str         # national / region / industry / other
+    scopes: Tuple[str, ...] # 적용 지역·업종 (전국이면 ("전국",))
+    label: str              # 원래 키에서 만든 표시용 라벨 ("울릉,독도", "근해채낚기, 연안복합, 정치망")
+    value: str
+
+def _scope_kind(tokens) -> str:
+    if all(t in REGIONS for t in tokens):
+        return "region"
+    if all(t.endswith(GEAR_SUFFIXES) for t in tokens):
+        return "industry"
+    return "other"
+
+def _parse_rule_key(species: str, key: str, value):
+    """복합 키 → Rule 또는 ("note", 규칙종류, 비고명) 또는 None"""
+    for rt in RULE_TYPES:
+        if key == rt:
+            return Rule(species, rt, "national", (NATIONAL,), NATIONAL, value)
+        if key.endswith("_" + rt):
+            raw = key[: -len(rt) - 1]
+            tokens = tuple(t.strip() for t in raw.split(",") if t.strip())
+            return Rule(species, rt, _scope_kind(tokens), tokens, raw.replace("_", " "), value)
+        if key.startswith(rt + "_"):
+            return ("note", rt, key[len(rt) + 1:])
+    return None
+
+RULES_BY_SPECIES: Dict[int, List[Rule]] = {}
+RULE_INDEX: Dict[Tuple[int, str, str], Rule] = {}          # (어종 ID, 지역/업종/"전국", 규칙종류) → Rule
+RULE_NOTES: Dict[Tuple[int, str], List[Tuple[str, str]]] = {}  # (어종 ID, 규칙종류) → [(비고명, 내용)]
+SCOPE_KIND: Dict[str, str] = {}                            # 지역/업종 토큰 → region / industry / other
+
+def _build_rule_index():
+    # 같은 어종의 중복 기록(넙치/광어 등)은 레지스트리에서 하나로 합쳐져 있음
+    for sp in SPECIES:
+        if sp.record is None:
+            continue
+        species = sp.id
+        rules = []
+        for key, value in sp.record.items():
+            parsed = _parse_rule_key(species, key, value)
+            if parsed is None:
+                continue
+            if isinstance(parsed, tuple) and parsed[0] == "note":
+                RULE_NOTES.setdefault((species, parsed[1]), []).append((parsed[2], value))
+                continue
+            rules.append(parsed)
+            for scope in parsed.scopes:
+                RULE_INDEX[(species, scope, parsed.rule_type)] = parsed
+                if parsed.scope_kind != "national":
+                    SCOPE_KIND.setdefault(scope, parsed.scope_kind)
+        RULES_BY_SPECIES[species] = rules
+_build_rule_index()
+
+def _sid(species: Union[int, str]) -> Optional[int]:
+    return species if isinstance(species, int) else species_id(species)
+
+def applicable_rule(species: Union[int, str], rule_type: str, region: Optional[str] = None,
+                    industry: Optional[str] = None) -> Optional[Rule]:
+    """지역/업종 규칙이 있으면 그것을, 없으면 전국 규칙을 반환 (어종은 ID 또는 이름)"""
+    species = _sid(species)
+    for scope in (region, industry):
+        if scope:
+            r = RULE_INDEX.get((species, scope, rule_type))
+            if r:
+                return r
+    return RULE_INDEX.get((species, NATIONAL, rule_type))
+
+def extract_scope(user_input: str, extra_regions=(), extra_industries=()):
+    """
+    발화에서 (지역, 업종) 토큰을 찾음 — 공백/쉼표로 구분된 낱말이 정확히 일치할 때만
+    어종 이름이기도 한 낱말("대구")은 어종으로 봄
+    """
+    region = industry = None
+    for tok in re.split(r"[\s,]+", user_input or ""):
+        if not tok or tok in SPECIES_BY_NAME:
+            continue
+        if region is None and (tok in REGIONS or tok in extra_regions or SCOPE_KIND.get(tok) == "region"):
+            region = tok
+        elif industry is None and (tok in extra_industries or SCOPE_KIND.get(tok) == "industry"):
+            industry = tok
+    return region, industry
+
+def extract_rule_type(user_input: str) -> Optional[str]:
+    t = user_input or ""
+    if "금어기" in t:
+        return "금어기"
+    if "체중" in t:
+        return "금지체중"
+    if "체장" in t or "크기" in t or "사이즈" in t:
+        return "금지체장"
+    return None
+
+def get_fish_info(fish_name: str, region: Optional[str] = None, industry: Optional[str] = None,
+                  rule_type: Optional[str] = None):
+    """특정 어종의 금어기·금지체장 정보 반환 (지역/업종을 주면 해당 규칙만)"""
+    sp = get_species(fish_name)
+    fish = sp.record if sp else None
+    display_name = fish_name
+    emoji = sp.emoji if sp else guess_emoji(fish_name)
 
     header = f"{emoji} {display_name} {emoji}\n\n"
 
@@ -130,17 +198,20 @@ def get_fish_info(fish_name: str):
         }]
         return header + body, buttons
 
+    if region or industry:
+        return _scoped_fish_info(sp.id, fish_name, fish, emoji, region, industry, rule_type), []
+
+    rules = RULES_BY_SPECIES.get(sp.id, [])
+
     # 🚫 금어기 섹션
     body = "🚫 금어기\n"
     main_ban = convert_period_format(fish.get("금어기"))
     body += f"전국: {main_ban}\n"
 
     # 기타 금어기 (업종별/지역별)
-    for k, v in fish.items():
-        if k.endswith("_금어기") and k != "금어기":
-            label = k.replace("_금어기", "").replace("_", " ")
-            formatted = convert_period_format(v)
-            body += f"{label}: {formatted}\n"
+    for r in rules:
+        if r.rule_type == "금어기" and r.scope_kind != "national":
+            body += f"{r.label}: {convert_period_format(r.value)}\n"
     body += "\n"
 
     # 📏 금지체장/체중
@@ -148,10 +219,9 @@ def get_fish_info(fish_name: str):
     total_size = fish.get("금지체장") or fish.get("금지체중") or "없음"
     body += f"{size_type}\n전국: {total_size}\n"
 
-    for k, v in fish.items():
-        if k.endswith("_금지체장") or k.endswith("_금지체중"):
-            region = k.replace("_금지체장", "").replace("_금지체중", "").replace("_", " ")
-            body += f"{region}: {v}\n"
+    for r in rules:
+        if r.rule_type in ("금지체장", "금지체중") and r.scope_kind != "national":
+            body += f"{r.label}: {r.value}\n"
     body += "\n"
 
     # ⚠️ 예외사항 및 포획비율제한
@@ -162,16 +232,56 @@ def get_fish_info(fish_name: str):
 
     return header + body.strip(), []
 
-def get_fishes_in_seasonal_ban(fish_data: dict, target_date: datetime = None):
-    """특정 날짜 기준 금어기 중인 어종 리스트 반환"""
+def _scoped_fish_info(sid, fish_name, fish, emoji, region, industry, rule_type):
+    scope_label = " · ".join(x for x in (region, industry) if x)
+    lines = [f"{emoji} {fish_name} {emoji}", f"📍 {scope_label} 적용 규제", ""]
+
+    def scope_line(rule, fmt):
+        if rule is None:
+            return f"{NATIONAL}: 없음"
+        where = next((x for x in (region, industry) if x and x in rule.scopes), NATIONAL)
+        return f"{where}: {fmt(rule.value)}"
+
+    if rule_type in (None, "금어기"):
+        ban = applicable_rule(sid, "금어기", region, industry)
+        lines += ["🚫 금어기", scope_line(ban, convert_period_format)]
+        for note, text in RULE_NOTES.get((sid, "금어기"), []):
+            lines.append(f"※ {note.replace('_', ' ')}: {text}")
+        lines.append("")
+
+    if rule_type in (None, "금지체장", "금지체중"):
+        size = applicable_rule(sid, "금지체장", region, industry)
+        weight = applicable_rule(sid, "금지체중", region, industry)
+        if size or not weight:
+            lines += ["📏 금지체장", scope_line(size, str), ""]
+        if weight:
+            lines += ["⚖️ 금지체중", scope_line(weight, str), ""]
+
+    if rule_type is None:
+        lines.append(f"⚠️ 예외사항: {fish.get('금어기_예외') or fish.get('예외사항') or '없음'}")
+        lines.append(f"⚠️ 포획비율제한: {fish.get('포획비율제한', '없음')}")
+    return "\n".join(lines).strip()
+
+def get_fishes_in_seasonal_ban(fish_data: Optional[dict] = None, target_date: datetime = None):
+    """
+    특정 날짜 기준 금어기 중인 어종 리스트 반환 (어종당 하나, 규제 기록의 fish_data 키)
+    fish_data를 주면 그 표에서 찾되 같은 어종 ID는 한 번만 포함
+    """
     if target_date is None:
         target_date = datetime.today()
-    
+    if fish_data is None:
+        records = [(sp.record_name, sp.record) for sp in SPECIES if sp.record]
+    else:
+        by_id = {}
+        for name, info in fish_data.items():
+            sid = species_id(name)
+            by_id.setdefault(name if sid is None else sid, (name, info))
+        records = list(by_id.values())
+
     md = (target_date.month, target_date.day)
     matched = []
-    seen = set()
 
-    for name, info in fish_data.items():
+    for name, info in records:
         period = info.get("금어기")
         if not isinstance(period, str) or "~" not in period:
             continue
@@ -188,13 +298,99 @@ def get_fishes_in_seasonal_ban(fish_data: dict, target_date: datetime = None):
                 in_range = (sm, sd) <= md <= (em, ed)
 
             if in_range:
-                norm = fish_name_aliases.get(name, name)
-                if norm not in seen:
-                    matched.append(name)
-                    seen.add(norm)
+                matched.append(name)
 
         except Exception as e:
             logger.warning(f"[금어기 파싱 오류] {name}: {period} / {e}")
             continue
 
     return matched
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 여러 어종 한 번에 — "갈치 고등어 참조기 금어기", "꽃게 대게 금지체장"
+#   섹션(금어기/금지체장/…)마다 어종별 내용을 모으고, 내용이 같은 어종은 한 줄로 묶음
+#   모든 어종이 "없음"인 섹션은 한 줄로 줄임
+# ──────────────────────────────────────────────────────────────────────────────
+MAX_MULTI_FISH = 6   # 본문에 싣는 최대 어종 수 (카카오 simpleText 길이 제한) — 나머지는 버튼으로
+
+def _multi_sections(sp, region, industry, rule_type) -> List[Tuple[str, Tuple[str, ...]]]:
+    """어종 하나의 [(섹션 제목, 내용 줄들)] — get_fish_info / _scoped_fish_info와 같은 규칙"""
+    fish, sid = sp.record or {}, sp.id
+    sections = []
+    scoped = bool(region or industry)
+
+    def scope_lines(rt, fmt):
+        rule = applicable_rule(sid, rt, region, industry)
+        if rule is None:
+            return ()
+        where = next((x for x in (region, industry) if x and x in rule.scopes), NATIONAL)
+        return (f"{fmt(rule.value)} ({where})",)
+
+    def other_lines(rts, fmt):
+        return tuple(f"{r.label}: {fmt(r.value)}" for r in RULES_BY_SPECIES.get(sid, [])
+                     if r.rule_type in rts and r.scope_kind != "national")
+
+    if rule_type in (None, "금어기"):
+        if scoped:
+            lines = scope_lines("금어기", convert_period_format)
+            lines += tuple(f"※ {n.replace('_', ' ')}: {t}" for n, t in RULE_NOTES.get((sid, "금어기"), []))
+        else:
+            main = convert_period_format(fish.get("금어기"))
+            others = other_lines(("금어기",), convert_period_format)
+            lines = ((f"{NATIONAL}: {main}" if others else main,) if main != "없음" else ()) + others
+        sections.append(("🚫 금어기", lines))
+
+    if rule_type in (None, "금지체장", "금지체중"):
+        for rt, title in (("금지체장", "📏 금지체장"), ("금지체중", "⚖️ 금지체중")):
+            if scoped:
+                lines = scope_lines(rt, str)
+            else:
+                others = other_lines((rt,), str)
+                lines = ((f"{NATIONAL}: {fish[rt]}" if others else fish[rt],) if fish.get(rt) else ()) + others
+            if lines or rt == "금지체장":
+                sections.append((title, lines))
+
+    if rule_type is None:
+        exception = fish.get("금어기_예외") or fish.get("예외사항")
+        ratio = fish.get("포획비율제한")
+        sections.append(("⚠️ 예외사항", (exception,) if exception else ()))
+        sections.append(("⚠️ 포획비율제한", (ratio,) if ratio else ()))
+    return sections
+
+def get_multi_fish_info(species: List[Union[int, str]], region: Optional[str] = None,
+                        industry: Optional[str] = None, rule_type: Optional[str] = None) -> str:
+    """여러 어종의 규제를 한 응답으로 (어종은 ID 또는 이름)"""
+    sps = [sp for sp in map(get_species, species) if sp]
+    shown, rest = sps[:MAX_MULTI_FISH], sps[MAX_MULTI_FISH:]
+
+    lines = [" · ".join(f"{sp.emoji} {sp.display}" for sp in shown)]
+    scope_label = " · ".join(x for x in (region, industry) if x)
+    if scope_label:
+        lines.append(f"📍 {scope_label} 적용 규제")
+    lines.append("")
+
+    # 섹션 제목 → {내용 줄들: [표시명, ...]} (섹션 순서는 처음 나온 순서)
+    merged: Dict[str, Dict[Tuple[str, ...], List[str]]] = {}
+    for sp in shown:
+        for title, body in _multi_sections(sp, region, industry, rule_type):
+            merged.setdefault(title, {}).setdefault(body, []).append(sp.display)
+
+    for title, groups in merged.items():
+        if list(groups) == [()]:
+            lines += [f"{title}: 없음", ""]
+            continue
+        lines.append(title)
+        for body, names in sorted(groups.items(), key=lambda g: not g[0]):   # "없음" 묶음은 맨 뒤
+            who = " · ".join(names)
+            if not body:
+                lines.append(f"• {who}: 없음")
+            elif len(body) == 1:
+                lines.append(f"• {who}: {body[0]}")
+            else:
+                lines.append(f"• {who}")
+                lines += [f"  {b}" for b in body]
+        lines.append("")
+
+    if rest:
+        lines.append(f"➕ 그 외 {', '.join(sp.display for sp in rest)}은(는) 아래 버튼을 눌러주세요.")
+    return "\n".join(lines).strip()
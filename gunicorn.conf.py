@@ -0,0 +1,7 @@
+# gunicorn.conf.py
+# gunicorn이 작업 디렉터리에서 자동으로 읽는 설정 — 워커마다 app.init_app()으로 백그라운드 작업 시작
+#   (app.py는 import만으로는 스레드/사전 계산을 시작하지 않음)
+
+def post_worker_init(worker):
+    import app
+    app.init_app()
@@ -0,0 +1,87 @@
+# rate_limiter.py
+# /TAC 과부하 보호
+#   • 사용자별 토큰 버킷: 카카오 user.id마다 초당 RATE_LIMIT_PER_SEC 개, 최대 RATE_LIMIT_BURST 개까지 연속 허용
+#   • 전역 입장 제어: 동시에 처리 중인 요청이 ADMISSION_MAX_INFLIGHT 개면 새 요청은 기다리지 않고 즉시 거절
+#   → 거절된 요청은 미리 인코딩해 둔 "잠시 후 다시 시도해 주세요" 응답을 받으므로 작업 스레드를 붙잡지 않음
+#
+# 환경변수
+#   RATE_LIMIT_PER_SEC      사용자별 초당 허용 요청 수 (0이면 사용자별 제한 끔)
+#   RATE_LIMIT_BURST        사용자별 연속 허용 요청 수
+#   RATE_LIMIT_MAX_USERS    버킷을 유지할 최대 사용자 수 (오래 안 쓴 사용자부터 제거)
+#   ADMISSION_MAX_INFLIGHT  동시 처리 요청 수 상한 (gthread 스레드 수보다 약간 작게, 0이면 끔)
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+RATE_LIMIT_PER_SEC = float(os.environ.get("RATE_LIMIT_PER_SEC", 2))
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", 5))
+RATE_LIMIT_MAX_USERS = int(os.environ.get("RATE_LIMIT_MAX_USERS", 100_000))
+ADMISSION_MAX_INFLIGHT = int(os.environ.get("ADMISSION_MAX_INFLIGHT", 12))
+
+STATS = {"admitted": 0, "rejected_user": 0, "rejected_busy": 0, "peak_inflight": 0}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 사용자별 토큰 버킷 — user_id → [남은 토큰, 마지막 갱신 시각]
+# ──────────────────────────────────────────────────────────────────────────────
+_buckets: "OrderedDict[str, list]" = OrderedDict()
+_buckets_lock = threading.Lock()
+
+def allow_user(user_id: str, now: Optional[float] = None) -> bool:
+    if not user_id or RATE_LIMIT_PER_SEC <= 0:
+        return True
+    now = now or time.monotonic()
+    with _buckets_lock:
+        b = _buckets.get(user_id)
+        if b is None:
+            b = _buckets[user_id] = [RATE_LIMIT_BURST, now]
+            while len(_buckets) > RATE_LIMIT_MAX_USERS:
+                _buckets.popitem(last=False)
+        else:
+            _buckets.move_to_end(user_id)
+            b[0] = min(RATE_LIMIT_BURST, b[0] + (now - b[1]) * RATE_LIMIT_PER_SEC)
+            b[1] = now
+        if b[0] < 1:
+            STATS["rejected_user"] += 1
+            return False
+        b[0] -= 1
+        return True
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 전역 입장 제어 — 대기열 없이 즉시 허용/거절
+# ──────────────────────────────────────────────────────────────────────────────
+_inflight = 0
+_inflight_lock = threading.Lock()
+
+def try_admit() -> bool:
+    global _inflight
+    if ADMISSION_MAX_INFLIGHT <= 0:
+        return True
+    with _inflight_lock:
+        if _inflight >= ADMISSION_MAX_INFLIGHT:
+            STATS["rejected_busy"] += 1
+            return False
+        _inflight += 1
+        STATS["admitted"] += 1
+        if _inflight > STATS["peak_inflight"]:
+            STATS["peak_inflight"] = _inflight
+        return True
+
+def release():
+    global _inflight
+    if ADMISSION_MAX_INFLIGHT <= 0:
+        return
+    with _inflight_lock:
+        _inflight -= 1
+
+def limiter_stats() -> Dict:
+    return {
+        **STATS,
+        "inflight": _inflight,
+        "max_inflight": ADMISSION_MAX_INFLIGHT,
+        "tracked_users": len(_buckets),
+        "per_sec": RATE_LIMIT_PER_SEC,
+        "burst": RATE_LIMIT_BURST,
+    }
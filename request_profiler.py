@@ -0,0 +1,68 @@
+# request_profiler.py
+# /TAC 단일 요청 프로파일링 (cProfile)
+#   • 관리자 헤더(X-Profile: 1 + X-Admin-Token) 또는 PROFILE_SAMPLE_RATE 확률로 요청별 활성화
+#   • 결과는 PROFILE_DIR에 "<시각>_<의도>_<슬롯>.prof"로 저장, 최근 PROFILE_KEEP개만 유지
+#   • 비활성 요청은 should_profile()의 분기 하나 외에 추가 비용 없음
+#
+# 보기: python -m pstats <파일>  또는  snakeviz <파일>
+
+import cProfile
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "/tmp/tac-profiles")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 200))
+
+_UNSAFE_RE = re.compile(r"[^0-9A-Za-z가-힣._-]+")
+_rotate_lock = threading.Lock()
+
+def should_profile(header_on: bool) -> bool:
+    if header_on:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def run_profiled(fn: Callable, *args, **kwargs) -> Tuple[object, cProfile.Profile, float]:
+    prof = cProfile.Profile()
+    t0 = time.perf_counter()
+    result = prof.runcall(fn, *args, **kwargs)
+    return result, prof, (time.perf_counter() - t0) * 1000
+
+def profile_filename(intent: Optional[str], slots: Optional[dict], elapsed_ms: float) -> str:
+    parts = [time.strftime("%Y%m%d-%H%M%S"), f"{int(time.time() * 1000) % 1000:03d}", intent or "unknown"]
+    for k, v in sorted((slots or {}).items()):
+        parts.append(f"{k}-{getattr(v, 'key', v)}")
+    parts.append(f"{elapsed_ms:.0f}ms")
+    name = _UNSAFE_RE.sub("_", "_".join(str(p) for p in parts))
+    return name[:200] + ".prof"
+
+def _rotate(directory: str, keep: int):
+    files = sorted(
+        (os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".prof")),
+        key=os.path.getmtime,
+    )
+    for path in files[:-keep] if keep > 0 else files:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def save_profile(prof: cProfile.Profile, intent: Optional[str], slots: Optional[dict], elapsed_ms: float) -> Optional[str]:
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, profile_filename(intent, slots, elapsed_ms))
+        prof.dump_stats(path)
+        with _rotate_lock:
+            _rotate(PROFILE_DIR, PROFILE_KEEP)
+        logger.info(f"[PROFILE] {path}")
+        return path
+    except Exception as ex:
+        logger.warning(f"[WARN] 프로파일 저장 실패: {ex}")
+        return None
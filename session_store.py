@@ -0,0 +1,65 @@
+# session_store.py
+# 사용자별 대화 맥락 (카카오 userRequest.user.id 기준)
+#   • 마지막으로 본 어종/업종/선적지만 보관 → "소진현황", "울산" 같은 짧은 후속 발화 해석에 사용
+#   • 크기 제한 LRU + TTL: SESSION_MAX_USERS 명을 넘으면 가장 오래 안 쓴 사용자부터 제거,
+#     SESSION_TTL_SEC 동안 요청이 없으면 만료
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+SESSION_MAX_USERS = int(os.environ.get("SESSION_MAX_USERS", 100_000))
+SESSION_TTL_SEC = float(os.environ.get("SESSION_TTL_SEC", 30 * 60))
+
+# user_id → (어종, 업종, 선적지, 만료시각)   ※ 업종/선적지는 없을 수 있음(None)
+Context = Tuple[str, Optional[str], Optional[str], float]
+
+_sessions: "OrderedDict[str, Context]" = OrderedDict()
+_lock = threading.Lock()
+
+STATS = {"requests": 0, "resolved_by_context": 0, "lookups": 0, "evicted": 0, "expired": 0}
+
+def get_context(user_id: str, now: Optional[float] = None) -> Optional[Context]:
+    if not user_id:
+        return None
+    now = now or time.monotonic()
+    with _lock:
+        ctx = _sessions.get(user_id)
+        if ctx is None:
+            return None
+        if ctx[3] < now:
+            del _sessions[user_id]
+            STATS["expired"] += 1
+            return None
+        _sessions.move_to_end(user_id)
+        return ctx
+
+def set_context(user_id: str, species: str, industry: Optional[str] = None, port: Optional[str] = None,
+                now: Optional[float] = None):
+    if not user_id:
+        return
+    now = now or time.monotonic()
+    # 슬롯 값은 TAC 메타데이터의 문자열 객체를 그대로 참조하므로 사용자별로 복사되지 않음
+    ctx = (species, industry, port, now + SESSION_TTL_SEC)
+    with _lock:
+        _sessions[user_id] = ctx
+        _sessions.move_to_end(user_id)
+        while len(_sessions) > SESSION_MAX_USERS:
+            _sessions.popitem(last=False)
+            STATS["evicted"] += 1
+
+def clear():
+    with _lock:
+        _sessions.clear()
+
+def session_stats() -> Dict:
+    lookups = STATS["lookups"]
+    return {
+        **STATS,
+        "active": len(_sessions),
+        "max_users": SESSION_MAX_USERS,
+        "ttl_sec": SESSION_TTL_SEC,
+        "requests_per_lookup": round(STATS["requests"] / lookups, 2) if lookups else None,
+    }
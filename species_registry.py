@@ -0,0 +1,153 @@
+# species_registry.py
+# 어종 레지스트리 — 같은 어종의 여러 이름(넙치/광어/넙치(광어), 우럭/조피볼락(우럭) …)을
+# 로드 시 하나의 정수 ID로 묶고, 표시명·이모지·별칭·규제 기록(fish_data)·TAC 메타데이터를 함께 보관
+#
+#   SPECIES[id]              → Species
+#   get_species("광어")      → 넙치(광어) 항목 (별칭/표시명/정규화 이름/TAC 키 모두 가능)
+#   species_id("우럭")       → 정수 ID
+#
+# 금어기 달력, 규제 색인 등은 이 ID를 키로 씁니다. 새 별칭은 fish_name_aliases에만 추가하면 됩니다.
+
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from fish_data import fish_data
+from TAC_data import TAC_DATA
+
+# 어종명 정규화 매핑 (별칭 → 정규화 이름)
+fish_name_aliases = {
+    "문치가자미": "문치가자미",
+    "감성돔": "감성돔",
+    "돌돔": "돌돔",
+    "참돔": "참돔",
+    "넙치": "넙치(광어)",
+    "광어": "넙치(광어)",
+    "농어": "농어",
+    "대구": "대구",
+    "도루묵": "도루묵",
+    "민어": "민어",
+    "방어": "방어",
+    "볼락": "볼락",
+    "붕장어": "붕장어",
+    "조피볼락": "조피볼락(우럭)",
+    "우럭": "조피볼락(우럭)",
+    "쥐노래미": "쥐노래미",
+    "참홍어": "참홍어",
+    "갈치": "갈치",
+    "고등어": "고등어",
+    "참조기": "참조기",
+    "말쥐치": "말쥐치",
+    "갯장어": "갯장어",
+    "미거지": "미거지",
+    "청어": "청어",
+    "꽃게": "꽃게",
+    "대게": "대게",
+    "붉은대게": "붉은대게",
+    "소라": "제주소라",
+    "제주소라": "제주소라",
+    "오분자기": "오분자기",
+    "전복류": "전복(전복류)",
+    "전복": "전복(전복류)",
+    "키조개": "키조개",
+    "기수재첩": "기수재첩",
+    "넓미역": "넓미역",
+    "우뭇가사리": "우뭇가사리",
+    "톳": "톳",
+    "대문어": "대문어",
+    "살오징어": "살오징어",
+    "오징어": "살오징어",
+    "낙지": "낙지",
+    "주꾸미": "주꾸미",
+    "쭈꾸미": "주꾸미",
+    "쭈구미": "주꾸미",
+    "참문어": "참문어",
+    "해삼": "해삼",
+}
+
+# 정규화 이름 → 화면 표시명 (없으면 정규화 이름 그대로, TAC 어종은 TAC_DATA의 display)
+display_name_map = {
+    "조피볼락(우럭)": "조피볼락",
+    "넙치(광어)": "넙치",
+    "전복(전복류)": "전복",
+    "제주소라": "제주소라",
+}
+
+fish_emojis = {
+    "대게": "🦀", "붉은대게": "🦀", "꽃게": "🦀",
+    "오분자기": "🐚", "키조개": "🦪", "제주소라": "🐚",
+    "주꾸미": "🐙", "대문어": "🐙", "참문어": "🐙",
+    "낙지": "🦑", "살오징어": "🦑",
+    "해삼": "🌊", "넓미역": "🌿", "우뭇가사리": "🌿", "톳": "🌿",
+}
+
+def guess_emoji(fish_name: str) -> str:
+    """fish_emojis에 없는 이름용 추정 이모지"""
+    if "전복" in fish_name or "소라" in fish_name:
+        return "🐚"
+    if "오징어" in fish_name:
+        return "🦑"
+    if any(x in fish_name for x in ["주꾸미", "문어", "낙지"]):
+        return "🐙"
+    if "게" in fish_name:
+        return "🦀"
+    if any(x in fish_name for x in ["미역", "우뭇가사리", "톳"]):
+        return "🌿"
+    return "🐟"
+
+class Species(NamedTuple):
+    id: int
+    key: str                    # 정규화 이름 (normalize_fish_name 결과, 예: "넙치(광어)")
+    display: str                # 화면 표시명 (예: "넙치")
+    emoji: str
+    names: Tuple[str, ...]      # 이 어종을 가리키는 모든 이름
+    record: Optional[dict]      # fish_data 규제 기록 (중복 키는 하나로 합쳐짐)
+    record_name: Optional[str]  # 규제 기록을 가져온 fish_data 키
+    tac_key: Optional[str]      # TAC_DATA 키 (TAC 대상이 아니면 None)
+    tac: Optional[dict]         # TAC_DATA 메타데이터
+
+SPECIES: List[Species] = []
+SPECIES_BY_NAME: Dict[str, int] = {}
+NAMES_LONGEST_FIRST: List[str] = []   # 발화 속 부분 일치 검색용 (긴 이름 우선)
+
+def _build_registry():
+    groups: Dict[str, List[str]] = {}   # 정규화 이름 → 이름들 (등장 순서 유지 → ID 순서는 fish_data 순)
+
+    def add(canon: str, *names: str):
+        group = groups.setdefault(canon, [canon])
+        for n in names:
+            if n and n not in group:
+                group.append(n)
+
+    for name in fish_data:
+        add(fish_name_aliases.get(name, name), name)
+    for alias, canon in fish_name_aliases.items():
+        add(canon, alias)
+    for sp, meta in TAC_DATA.items():
+        add(fish_name_aliases.get(sp, sp), sp, meta.get("display"), *meta.get("aliases", []))
+    for canon, disp in display_name_map.items():
+        add(canon, disp)
+
+    for canon, names in groups.items():
+        record_name = next((n for n in names if n in fish_data), None)
+        tac_key = next((n for n in names if n in TAC_DATA), None)
+        tac = TAC_DATA[tac_key] if tac_key else None
+        display = tac.get("display", tac_key) if tac else display_name_map.get(canon, canon)
+        emoji = next((fish_emojis[n] for n in (canon, display) if n in fish_emojis), None) or guess_emoji(canon)
+        sid = len(SPECIES)
+        SPECIES.append(Species(
+            sid, canon, display, emoji, tuple(names),
+            fish_data[record_name] if record_name else None, record_name, tac_key, tac,
+        ))
+        for n in names:
+            SPECIES_BY_NAME.setdefault(n, sid)
+    NAMES_LONGEST_FIRST.extend(sorted(SPECIES_BY_NAME, key=len, reverse=True))
+_build_registry()
+
+def species_id(name: str) -> Optional[int]:
+    return SPECIES_BY_NAME.get(name)
+
+def get_species(ref: Union[int, str, None]) -> Optional[Species]:
+    """ID 또는 이름(정규화 이름/별칭/표시명/TAC 키) → Species"""
+    if isinstance(ref, int):
+        return SPECIES[ref] if 0 <= ref < len(SPECIES) else None
+    sid = SPECIES_BY_NAME.get(ref)
+    return SPECIES[sid] if sid is not None else None
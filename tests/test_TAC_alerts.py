@@ -0,0 +1,118 @@
+# tests/test_TAC_alerts.py
+# 소진율 임계치 알림 — 로컬 웹훅 대역(HTTP 서버)으로 묶음 전송·재시도, 기준값 채우기 확인
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import TAC_alerts as A
+
+class Webhook:
+    """받은 배치를 기록하는 로컬 웹훅 — 처음 fail_first번은 500으로 응답"""
+    def __init__(self, fail_first: int = 0):
+        self.batches = []
+        self.attempts = 0
+        self.fail_first = fail_first
+        hook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                hook.attempts += 1
+                if hook.attempts <= hook.fail_first:
+                    self.send_response(500)
+                else:
+                    hook.batches.append(body["events"])
+                    self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def received(self):
+        return sum(len(b) for b in self.batches)
+
+@pytest.fixture
+def delivery(monkeypatch):
+    """빈 outbox/상태/통계로 시작하고, 끝나면 전송기를 멈춤"""
+    monkeypatch.setattr(A, "BATCH_SIZE", 2)
+    monkeypatch.setattr(A, "FLUSH_SEC", 0.05)
+    monkeypatch.setattr(A, "_last_pct", {})
+    monkeypatch.setattr(A, "STATS", {k: 0 for k in A.STATS})
+    A._outbox.clear()
+    hooks = []
+
+    def start(fail_first: int = 0):
+        hook = Webhook(fail_first)
+        hooks.append(hook)
+        A.start_delivery(hook.url)
+        return hook
+    yield start
+    A.stop_delivery()
+    if A._deliverer is not None:
+        A._deliverer.join(timeout=5)
+    for hook in hooks:
+        hook.server.shutdown()
+    A._outbox.clear()
+
+def wait_for(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+def vessel_rows(*pcts):
+    return [{"선명": f"배{i}", "소진율_pct": p} for i, p in enumerate(pcts)]
+
+KEY = ("살오징어", "근해채낚기", "대역항")
+
+def test_events_delivered_in_batches(delivery):
+    hook = delivery()
+    A.detect("depletion", KEY, None, vessel_rows(10, 20, 30, 40, 45))
+    A.detect("depletion", KEY, None, vessel_rows(55, 55, 55, 55, 55))
+    assert wait_for(lambda: hook.received() == 5)
+    assert all(len(b) <= 2 for b in hook.batches)
+    assert sorted(e["vessel"] for b in hook.batches for e in b) == [f"배{i}" for i in range(5)]
+    assert {e["threshold"] for b in hook.batches for e in b} == {50}
+    assert A.STATS["delivered"] == 5 and A.STATS["failed"] == 0
+
+def test_failed_batch_is_retried(delivery):
+    hook = delivery(fail_first=1)
+    A.detect("weekly_report", KEY, None, {"배분량소진율": 81.0})
+    assert wait_for(lambda: hook.received() == 2)
+    assert hook.attempts == 2
+    assert [e["threshold"] for e in hook.batches[0]] == [50, 80]
+    assert A.STATS["delivered"] == 2 and A.STATS["failed"] == 0
+
+def test_batch_dropped_after_max_retries(delivery, monkeypatch):
+    monkeypatch.setattr(A, "MAX_RETRIES", 0)
+    hook = delivery(fail_first=1)
+    A.detect("weekly_report", KEY, None, {"배분량소진율": 60.0})
+    assert wait_for(lambda: A.STATS["failed"] == 1)
+    assert hook.received() == 0
+
+def test_new_key_alerts_from_zero_and_seeded_key_does_not(monkeypatch):
+    monkeypatch.setattr(A, "_last_pct", {})
+    monkeypatch.setattr(A, "_push", lambda events: pushed.extend(events))
+    pushed = []
+    monkeypatch.setattr(A, "WEEKLY_REPORT", {KEY: {"배분량소진율": 90.0}})
+    monkeypatch.setattr(A, "DEPLETION_ROWS", {})
+    assert A.seed_state() == 1
+
+    A.detect("weekly_report", KEY, None, {"배분량소진율": 90.0})   # 재시작 후 같은 값 → 알림 없음
+    assert pushed == []
+    A.detect("weekly_report", KEY, None, {"배분량소진율": 96.0})
+    assert [e["threshold"] for e in pushed] == [95]
+
+    pushed.clear()
+    A.detect("depletion", KEY, None, vessel_rows(82.0))            # 처음 보는 선박 → 0%부터
+    assert [(e["vessel"], e["threshold"], e["old_pct"]) for e in pushed] == [("배0", 50, 0.0), ("배0", 80, 0.0)]
@@ -0,0 +1,137 @@
+# tests/test_TAC_resilience.py
+# 데이터 호출 보호 — 백엔드를 느린/예외 스텁으로 바꿔 마지막 정상 값·차단기·마감시각 동작 확인
+
+import threading
+import time
+from collections import OrderedDict
+
+import pytest
+
+import TAC_resilience as R
+from TAC_data_sources import get_weekly_report
+
+KEY = ("테스트어종", "테스트업종", "테스트항")
+
+@pytest.fixture
+def guard(monkeypatch):
+    """get_weekly_report의 보호 상태를 새로 만들고 (차단기: 실패 3회, 냉각 0.2초) 끝나면 원래 백엔드로"""
+    g = get_weekly_report.guard
+    monkeypatch.setattr(g, "breaker", R.CircuitBreaker(failures=3, cooldown=0.2))
+    monkeypatch.setattr(g, "last_good", OrderedDict())
+    monkeypatch.setattr(get_weekly_report, "backend", get_weekly_report.backend)
+    return g
+
+def ok_backend(value):
+    calls = []
+    def backend(*args, **kwargs):
+        calls.append(args)
+        return value
+    backend.calls = calls
+    return backend
+
+def raising_backend():
+    calls = []
+    def backend(*args, **kwargs):
+        calls.append(args)
+        raise RuntimeError("backend down")
+    backend.calls = calls
+    return backend
+
+def slow_backend(value, delay):
+    release = threading.Event()
+    calls = []
+    def backend(*args, **kwargs):
+        calls.append(args)
+        release.wait(delay)
+        return value
+    backend.calls = calls
+    backend.release = release
+    return backend
+
+def call_with_deadline(deadline):
+    token = R.begin_request(deadline)
+    try:
+        return get_weekly_report(*KEY), R.stale_age()
+    finally:
+        R.end_request(token)
+
+def test_stale_value_served_with_age_on_timeout(guard):
+    get_weekly_report.backend = ok_backend({"배분량소진율": 10.0})
+    assert call_with_deadline(None) == ({"배분량소진율": 10.0}, None)
+
+    time.sleep(0.05)
+    slow = slow_backend({"배분량소진율": 20.0}, 5)
+    get_weekly_report.backend = slow
+    value, age = call_with_deadline(time.monotonic())   # 남은 예산 없음 → 최소 대기 후 마지막 정상 값
+    assert value == {"배분량소진율": 10.0}
+    assert age is not None and age >= 0.05
+    assert guard.stats["timeouts"] >= 1
+
+    # 마감 후 끝난 호출이 마지막 정상 값을 갱신
+    slow.release.set()
+    for _ in range(100):
+        if not guard.inflight:
+            break
+        time.sleep(0.01)
+    assert guard.last_good[(KEY, ())][0] == {"배분량소진율": 20.0}
+
+def test_error_without_last_good_returns_default_and_marks_stale(guard):
+    get_weekly_report.backend = raising_backend()
+    value, age = call_with_deadline(None)
+    assert value is None
+    assert age == float("inf")
+
+def test_concurrent_calls_share_one_backend_call(guard):
+    slow = slow_backend({"배분량소진율": 30.0}, 0.2)
+    get_weekly_report.backend = slow
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(call_with_deadline(None)[0])) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [{"배분량소진율": 30.0}] * 5
+    assert len(slow.calls) == 1
+
+def test_breaker_opens_after_failures_and_half_open_trial_closes_it(guard):
+    get_weekly_report.backend = ok_backend({"배분량소진율": 40.0})
+    call_with_deadline(None)
+
+    failing = raising_backend()
+    get_weekly_report.backend = failing
+    for _ in range(3):
+        assert call_with_deadline(None)[0] == {"배분량소진율": 40.0}
+    assert guard.breaker.state == "open"
+
+    # 열린 동안은 백엔드를 부르지 않고 마지막 정상 값만
+    short_before = guard.stats["short_circuited"]
+    value, age = call_with_deadline(None)
+    assert value == {"배분량소진율": 40.0} and age is not None
+    assert len(failing.calls) == 3
+    assert guard.stats["short_circuited"] == short_before + 1
+
+    # 냉각 후 시험 호출 1회가 성공하면 닫힘
+    time.sleep(0.25)
+    assert guard.breaker.state == "half_open"
+    recovered = ok_backend({"배분량소진율": 50.0})
+    get_weekly_report.backend = recovered
+    assert call_with_deadline(None) == ({"배분량소진율": 50.0}, None)
+    assert guard.breaker.state == "closed"
+    assert len(recovered.calls) == 1
+
+def test_half_open_trial_failure_reopens(guard):
+    get_weekly_report.backend = raising_backend()
+    for _ in range(3):
+        call_with_deadline(None)
+    time.sleep(0.25)
+    call_with_deadline(None)   # 시험 호출 실패
+    assert guard.breaker.state == "open"
+
+def test_end_request_clears_deadline_and_staleness():
+    token = R.begin_request(time.monotonic() + 100)
+    R._mark_stale(12.0)
+    assert R._wait_seconds() > R.DS_CALL_TIMEOUT_MS / 1000
+    assert R.stale_age() == 12.0
+    R.end_request(token)
+    assert R._wait_seconds() == R.DS_CALL_TIMEOUT_MS / 1000
+    assert R.stale_age() is None
@@ -0,0 +1,190 @@
+# utterance_stats.py
+# 발화 빈도 집계 (메모리 고정)
+#   • 정규화 발화 / "없음" 안내로 떨어진 발화(fish_unknown)를 각각 count-min 스케치 + 상위 K 힙으로 추적
+#   • 의도별 건수는 종류가 몇 개뿐이므로 정확히 셈
+#   • 주기적으로 JSON 파일에 저장하고, 시작 시 불러옴 → 상위 발화는 응답 캐시 워밍 시드로 사용
+#   • 스케치는 실제보다 크게 셀 수는 있어도 작게 세지는 않음 (오차 ≈ 전체 건수 × e / 폭)
+#   • 집계는 프로세스 단위 — 워커가 여럿이면 마지막으로 저장한 워커의 집계가 파일에 남음(표본으로 충분)
+#
+# 환경변수
+#   UTTERANCE_STATS_PATH     저장 파일 (빈 값이면 저장 안 함)
+#   UTTERANCE_PERSIST_SEC    저장 주기
+#   UTTERANCE_TOP_K          추적할 상위 발화 수
+#   UTTERANCE_SKETCH_WIDTH   스케치 폭 (행당 칸 수)
+
+import atexit
+import base64
+import hashlib
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+UTTERANCE_STATS_PATH = os.environ.get("UTTERANCE_STATS_PATH", "/tmp/tac-utterances.json")
+UTTERANCE_PERSIST_SEC = float(os.environ.get("UTTERANCE_PERSIST_SEC", 300))
+UTTERANCE_TOP_K = int(os.environ.get("UTTERANCE_TOP_K", 200))
+UTTERANCE_SKETCH_WIDTH = int(os.environ.get("UTTERANCE_SKETCH_WIDTH", 4096))
+SKETCH_DEPTH = 4
+MAX_UTTERANCE_LEN = 100   # 이보다 긴 발화는 잘라서 셈 (상위 목록 메모리 제한)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# count-min 스케치 + 상위 K
+# ──────────────────────────────────────────────────────────────────────────────
+class HeavyHitters:
+    def __init__(self, k: int = UTTERANCE_TOP_K, width: int = UTTERANCE_SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.k, self.width, self.depth = k, width, depth
+        self.rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+        self.total = 0
+        self.top: Dict[str, int] = {}             # 발화 → 추정 건수 (최대 k개)
+        self.heap: List[Tuple[int, str]] = []     # (건수, 발화) — 오래된 항목은 꺼낼 때 걸러냄
+
+    def _cells(self, item: str):
+        # 프로세스마다 바뀌는 hash() 대신 고정 해시 → 저장한 스케치를 재시작 후에도 그대로 사용
+        h = hashlib.blake2b(item.encode("utf-8"), digest_size=4 * self.depth).digest()
+        return [int.from_bytes(h[4 * i:4 * i + 4], "little") % self.width for i in range(self.depth)]
+
+    def add(self, item: str, n: int = 1) -> int:
+        est = None
+        for row, c in zip(self.rows, self._cells(item)):
+            row[c] += n
+            est = row[c] if est is None else min(est, row[c])
+        self.total += n
+        self._offer(item, est)
+        return est
+
+    def estimate(self, item: str) -> int:
+        return min(row[c] for row, c in zip(self.rows, self._cells(item)))
+
+    def _offer(self, item: str, est: int):
+        if item in self.top or len(self.top) < self.k:
+            self.top[item] = est
+            heapq.heappush(self.heap, (est, item))
+        else:
+            while self.heap and self.top.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            if self.heap and est > self.heap[0][0]:
+                _, evicted = heapq.heappop(self.heap)
+                del self.top[evicted]
+                self.top[item] = est
+                heapq.heappush(self.heap, (est, item))
+        if len(self.heap) > 4 * self.k:   # 갱신으로 쌓인 오래된 항목 정리
+            self.heap = [(c, i) for i, c in self.top.items()]
+            heapq.heapify(self.heap)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        return sorted(self.top.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+    def to_dict(self) -> Dict:
+        return {
+            "width": self.width, "depth": self.depth, "total": self.total,
+            "rows": [base64.b64encode(r.tobytes()).decode("ascii") for r in self.rows],
+            "top": self.top,
+        }
+
+    def load(self, d: Dict) -> bool:
+        if d.get("width") != self.width or d.get("depth") != self.depth:
+            return False
+        rows = []
+        for b in d["rows"]:
+            r = array("q")
+            r.frombytes(base64.b64decode(b))
+            rows.append(r)
+        self.rows, self.total = rows, int(d.get("total", 0))
+        self.top = {}
+        self.heap = []
+        for item, est in sorted(d.get("top", {}).items(), key=lambda kv: -kv[1])[: self.k]:
+            self._offer(item, int(est))
+        return True
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 전역 집계
+# ──────────────────────────────────────────────────────────────────────────────
+UTTERANCES = HeavyHitters()
+UNKNOWN = HeavyHitters()          # get_fish_info "없음" 안내로 떨어진 발화 → 별칭 후보
+INTENTS: Dict[str, int] = {}
+_lock = threading.Lock()
+
+UNKNOWN_INTENTS = ("fish_unknown",)
+
+def record(utterance: str, intent: Optional[str]):
+    """fishbot 요청 1건 반영 (utterance는 정규화된 발화)"""
+    u = (utterance or "")[:MAX_UTTERANCE_LEN]
+    with _lock:
+        INTENTS[intent or "error"] = INTENTS.get(intent or "error", 0) + 1
+        if not u:
+            return
+        UTTERANCES.add(u)
+        if intent in UNKNOWN_INTENTS:
+            UNKNOWN.add(u)
+
+def top_utterances(n: int) -> List[str]:
+    with _lock:
+        return [u for u, _ in UTTERANCES.most_common(n)]
+
+def utterance_stats(n: int = 50) -> Dict:
+    with _lock:
+        return {
+            "total": UTTERANCES.total,
+            "intents": dict(sorted(INTENTS.items(), key=lambda kv: -kv[1])),
+            "top": UTTERANCES.most_common(n),
+            "unknown_total": UNKNOWN.total,
+            "unknown_top": UNKNOWN.most_common(n),
+            "sketch": {"width": UTTERANCES.width, "depth": UTTERANCES.depth, "top_k": UTTERANCES.k},
+        }
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 저장/불러오기
+# ──────────────────────────────────────────────────────────────────────────────
+def save(path: str = UTTERANCE_STATS_PATH) -> bool:
+    if not path:
+        return False
+    with _lock:
+        data = {"utterances": UTTERANCES.to_dict(), "unknown": UNKNOWN.to_dict(), "intents": dict(INTENTS)}
+    try:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return True
+    except OSError as ex:
+        logger.warning(f"[WARN] 발화 통계 저장 실패: {ex}")
+        return False
+
+def load(path: str = UTTERANCE_STATS_PATH) -> bool:
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        with _lock:
+            ok = UTTERANCES.load(data["utterances"]) and UNKNOWN.load(data["unknown"])
+            if ok:
+                INTENTS.update({k: int(v) for k, v in data.get("intents", {}).items()})
+        if not ok:
+            logger.warning("[WARN] 발화 통계 파일의 스케치 크기가 달라 무시합니다.")
+        return ok
+    except (OSError, ValueError, KeyError) as ex:
+        logger.warning(f"[WARN] 발화 통계 불러오기 실패: {ex}")
+        return False
+
+_persist_started = False
+
+def start_persisting(interval: float = UTTERANCE_PERSIST_SEC):
+    """주기 저장 스레드 시작 (한 번만)"""
+    global _persist_started
+    if _persist_started or not UTTERANCE_STATS_PATH or interval <= 0:
+        return
+    _persist_started = True
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            save()
+    threading.Thread(target=loop, name="tac-utterance-stats", daemon=True).start()
+    atexit.register(save)